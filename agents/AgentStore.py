@@ -0,0 +1,86 @@
+import numpy as np
+
+from enums.groups.AgeGroup import AgeGroup
+from enums.groups.EducationGroup import EducationGroup
+from enums.State import State
+
+STATES = list(State)
+AGE_GROUPS = list(AgeGroup)
+EDUCATION_GROUPS = list(EducationGroup)
+
+
+class AgentView:
+    # Lightweight stand-in for a UserAgent, reading and writing the store
+    __slots__ = ("store", "unique_id", "cell", "__weakref__")
+
+    pos = None
+
+    def __init__(self, store, unique_id, cell=None):
+        self.store = store
+        self.unique_id = unique_id
+        self.cell = cell
+
+    @property
+    def state(self):
+        return STATES[self.store.state[self.unique_id]]
+
+    @state.setter
+    def state(self, state):
+        self.store.set_state(self.unique_id, state)
+
+    @property
+    def age_group(self):
+        return AGE_GROUPS[self.store.age[self.unique_id]]
+
+    @property
+    def education_group(self):
+        return EDUCATION_GROUPS[self.store.education[self.unique_id]]
+
+    @property
+    def sex_group(self):
+        return int(self.store.sex[self.unique_id])
+
+    def __repr__(self):
+        return f"AgentView({self.unique_id}, {self.state.name})"
+
+
+class AgentStore:
+    # Struct-of-arrays population: one int8 code per agent and attribute
+    def __init__(self, state, age, education, sex):
+        self.state = state
+        self.age = age
+        self.education = education
+        self.sex = sex
+        self.counts = {
+            s: int(c)
+            for s, c in zip(STATES, np.bincount(state, minlength=len(STATES)))
+        }
+
+    def __len__(self):
+        return len(self.state)
+
+    def view(self, unique_id):
+        return AgentView(self, unique_id)
+
+    def views(self):
+        return [AgentView(self, i) for i in range(len(self))]
+
+    def set_state(self, unique_id, state):
+        self.counts[STATES[self.state[unique_id]]] -= 1
+        self.counts[state] += 1
+        self.state[unique_id] = state.value
+
+    def commit(self, new):
+        changed = np.flatnonzero(new != self.state)
+        removed = np.bincount(self.state[changed], minlength=len(STATES))
+        added = np.bincount(new[changed], minlength=len(STATES))
+        for s in STATES:
+            self.counts[s] += int(added[s.value] - removed[s.value])
+        self.state[changed] = new[changed]
+        return changed
+
+    def nbytes(self):
+        return sum(
+            array.nbytes
+            for array in (self.state, self.age, self.education, self.sex)
+        )
@@ -1,89 +1,72 @@
+import time
+
+import numpy as np
 from mesa.experimental.cell_space.cell_agent import FixedAgent
-from enums.distributions.AgeDistribution import AgeDistribution
-from enums.distributions.EducationDistribution import EducationDistribution
 from enums.State import State
 
 class UserAgent(FixedAgent):
-    def __init__(self, model, initial_state, unique_id, age_group, sex_group, education_group,cell):
+    _state = None
+
+    def __init__(
+        self, model, initial_state, unique_id, age_group, sex_group,
+        education_group, cell=None,
+    ):
         super().__init__(model)
-        self.state = initial_state
         self.unique_id = unique_id
+        # The model's store already counts the initial state
+        self._state = initial_state
+        self.model.agents_by_state[initial_state][self] = None
         self.age_group = age_group
         self.sex_group = sex_group
         self.education_group = education_group
-        self.cell = cell
-
-    def get_neighbor_counts(self):
-        counts = {state: 0 for state in State}
-        for agent in self.cell.neighborhood.agents:
-            counts[agent.state] += 1
-        N = sum(counts.values())
-        return counts, N
+        if cell is not None:
+            self.cell = cell
 
+    @property
+    def state(self):
+        return self._state
 
-    def calculate_transition_score(self, counts, N, signs):
-        a = self.model.age_weight
-        b = self.model.education_weight
-        c = self.model.sex_weight
-
-        age_score = AgeDistribution[self.state][self.age_group] * a * self.random.uniform(0.9, 1)
-        edu_score = EducationDistribution[self.state][self.education_group] * b * self.random.uniform(0.9, 1)
-        sex_score = self.sex_group * c * self.random.uniform(0.05, 0.1)
-
-        neighbor_score = sum(
-            (signs[state] * counts[state] / N) if N > 0 else 0
-            for state in signs
-        )
+    @state.setter
+    def state(self, state):
+        # Keep the model's live per-state counters in step with transitions
+        counts = self.model.state_counts
+        members = self.model.agents_by_state
+        if self._state is not None:
+            counts[self._state] -= 1
+            del members[self._state][self]
+        counts[state] += 1
+        members[state][self] = None
+        self._state = state
+        self.model.state_codes[self.unique_id] = state.value
 
-        return age_score + edu_score + sex_score + neighbor_score
-
-    def step(self):
-        counts, N = self.get_neighbor_counts()
-
-        if self.state == State.SUSCEPTIBLE:
-            # Transition S -> E
-            signs = {State.EXPOSED: +1, State.INFECTED: +1, State.DOUBTFUL: -1, State.RECOVERED: -1}
-            score = self.calculate_transition_score(counts, N, signs)
-            if score > self.model.threshold_SE:
-                self.state = State.EXPOSED
-
-        elif self.state == State.EXPOSED:
-            # Transition E -> I
-            signs_EI = {State.EXPOSED: +1, State.INFECTED: +1, State.DOUBTFUL: -1, State.RECOVERED: -1}
-            score_EI = self.calculate_transition_score(counts, N, signs_EI)
-            if score_EI > self.model.threshold_EI:
-                self.state = State.INFECTED
-                return
-
-            # Transition E -> D
-            signs_ED = {State.EXPOSED: -1, State.INFECTED: -1, State.DOUBTFUL: +1, State.RECOVERED: +1}
-            score_ED = self.calculate_transition_score(counts, N, signs_ED)
-            if score_ED > self.model.threshold_ED:
-                self.state = State.DOUBTFUL
+    def get_neighbor_counts(self):
+        # Per-state neighbor counts read straight from the state codes,
+        # which the state setter keeps current
+        neighbors = self.model.topology.neighbors(self.unique_id)
+        states = self.model.state_codes[neighbors]
+        return np.bincount(states, minlength=len(State)), len(states)
 
-        elif self.state == State.INFECTED:
-            # Transition I -> R
-            signs = {
-                State.EXPOSED: -1,
-                State.INFECTED: -1,
-                State.DOUBTFUL: +1,
-                State.RECOVERED: +1,
-                State.SUSCEPTIBLE: -1
-            }
-            score = self.calculate_transition_score(counts, N, signs)
-            if score > self.model.threshold_IR:
-                self.state = State.RECOVERED
+    def step(self, demographic):
+        new_state = self.next_state(demographic)
+        if new_state is not self.state:
+            self.state = new_state
 
-        elif self.state == State.DOUBTFUL:
-            # Transition D -> E
-            signs = {
-                State.EXPOSED: +1,
-                State.INFECTED: +1,
-                State.DOUBTFUL: -1,
-                State.RECOVERED: -1,
-                State.SUSCEPTIBLE: +1
-            }
-            score = self.calculate_transition_score(counts, N, signs)
-            if score > self.model.threshold_DE:
-                self.state = State.EXPOSED
+    def next_state(self, demographic):
+        # Decides the transition from the current neighbor states without
+        # applying it, so synchronous updates can commit all agents at once.
+        # demographic holds this agent's scores for the step's evaluations
+        profiler = self.model.profiler
+        if profiler is None:
+            counts, N = self.get_neighbor_counts()
+        else:
+            started = time.perf_counter()
+            counts, N = self.get_neighbor_counts()
+            profiler.add("neighbors", time.perf_counter() - started)
 
+        return self.model.rules.next_state(
+            self.state,
+            counts,
+            N,
+            demographic,
+            self.model,
+        )
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+from graphs.Generators import GENERATORS
+from models.DisinformationModel import block_params, generator_params
+
+
+def cases(num_nodes, degree):
+    # (generator, our params, networkx builder) triples at matching density
+    import networkx as nx
+
+    er = generator_params("erdos_renyi", num_nodes, degree)
+    ba = generator_params("barabasi_albert", num_nodes, degree)
+    ws = generator_params("watts_strogatz", num_nodes, degree)
+    cm = generator_params("configuration", num_nodes, degree)
+    sizes = tuple(np.full(36, num_nodes // 36).tolist())
+    sizes = sizes[:-1] + (num_nodes - sum(sizes[:-1]),)
+    sbm = block_params(sizes, degree)
+    probs = np.full((len(sizes), len(sizes)), sbm["p_out"])
+    np.fill_diagonal(probs, sbm["p_in"])
+
+    def configuration_nx(seed):
+        graph = GENERATORS["configuration"](
+            num_nodes, rng=np.random.default_rng(seed), **cm
+        )
+        return nx.configuration_model(graph.degree().tolist(), seed=seed)
+
+    return [
+        ("erdos_renyi", er,
+         lambda seed: nx.fast_gnp_random_graph(num_nodes, er["prob"], seed)),
+        ("barabasi_albert", ba,
+         lambda seed: nx.barabasi_albert_graph(num_nodes, ba["m"], seed)),
+        ("watts_strogatz", ws,
+         lambda seed: nx.watts_strogatz_graph(
+             num_nodes, ws["k"], ws["prob"], seed
+         )),
+        ("configuration", cm, configuration_nx),
+        ("stochastic_block", {"sizes": sizes, **sbm},
+         lambda seed: nx.stochastic_block_model(
+             list(sizes), probs.tolist(), seed=seed, sparse=True
+         )),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CSR topology generators against networkx."
+    )
+    parser.add_argument("--num-nodes", type=int, default=1000000)
+    parser.add_argument("--avg-node-degree", type=float, default=6)
+    parser.add_argument(
+        "--generators", default=",".join(GENERATORS),
+        help="Comma-separated generator names",
+    )
+    parser.add_argument(
+        "--skip-networkx", action="store_true",
+        help="Only time the CSR generators",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="JSON file to write")
+    args = parser.parse_args(argv)
+
+    wanted = args.generators.split(",")
+    results = []
+    for name, params, networkx_builder in cases(
+        args.num_nodes, args.avg_node_degree
+    ):
+        if name not in wanted:
+            continue
+        start = time.perf_counter()
+        graph = GENERATORS[name](
+            args.num_nodes, rng=np.random.default_rng(args.seed), **params
+        )
+        csr = time.perf_counter() - start
+        result = {
+            "generator": name,
+            "num_nodes": args.num_nodes,
+            "num_edges": int(graph.num_edges),
+            "csr_s": csr,
+            "networkx_s": None,
+            "networkx_edges": None,
+        }
+        if not args.skip_networkx:
+            start = time.perf_counter()
+            reference = networkx_builder(args.seed)
+            result["networkx_s"] = time.perf_counter() - start
+            result["networkx_edges"] = reference.number_of_edges()
+            del reference
+
+        line = (
+            f"{name:>16} n={args.num_nodes:<8} m={result['num_edges']:<9} "
+            f"csr {csr:.3f}s"
+        )
+        if result["networkx_s"] is not None:
+            line += (
+                f"  networkx {result['networkx_s']:.3f}s "
+                f"(x{result['networkx_s'] / csr:.0f})"
+            )
+        print(line)
+        results.append(result)
+
+    commit = git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"generators-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as file:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from queue import Empty
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Ignored by git; pass --out to keep results elsewhere
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Benchmarked configurations: name -> DisinformationModel arguments
+CONFIGS = {
+    "agents": {"engine": "agents"},
+    "agents-sync": {"engine": "agents", "update": "sync"},
+    "numpy": {"engine": "numpy"},
+    "compact": {"engine": "numpy", "compact": True},
+    "parallel": {"engine": "parallel", "compact": True},
+}
+
+
+def measure(case, queue):
+    # Runs in a fresh process so peak RSS belongs to this case alone
+    sys.path.insert(0, ROOT)
+    from models.DisinformationModel import DisinformationModel
+
+    start = time.perf_counter()
+    model = DisinformationModel(
+        num_agents=case["num_agents"],
+        avg_node_degree=case["avg_node_degree"],
+        seed=case["seed"],
+        **CONFIGS[case["engine"]],
+    )
+    construct = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(case["steps"]):
+        model.step()
+    step = (time.perf_counter() - start) / case["steps"]
+
+    start = time.perf_counter()
+    for _ in range(case["steps"]):
+        model.datacollector.collect(model)
+    collect = (time.perf_counter() - start) / case["steps"]
+
+    model.close()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    queue.put({
+        **case,
+        "construct_s": construct,
+        "step_s": step,
+        "collect_s": collect,
+        "peak_rss_mb": peak_mb,
+    })
+
+
+def run_case(case, timeout):
+    # A child that crashes, is OOM-killed or overruns timeout seconds is
+    # reported as a failed case instead of hanging the whole run
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(case, queue))
+    process.start()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except Empty:
+            if not process.is_alive():
+                error = f"exited with code {process.exitcode}"
+            elif time.monotonic() > deadline:
+                process.terminate()
+                error = f"timed out after {timeout:g}s"
+            else:
+                continue
+            result = {**case, "error": error}
+            break
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    key = ("engine", "num_agents", "avg_node_degree")
+    previous = {tuple(r[k] for k in key): r for r in baseline["results"]}
+    for result in results:
+        old = previous.get(tuple(result[k] for k in key))
+        if old is None or "error" in result or "error" in old:
+            continue
+        ratios = ", ".join(
+            f"{metric} x{result[metric] / old[metric]:.2f}"
+            for metric in ("construct_s", "step_s", "collect_s", "peak_rss_mb")
+            if old[metric] > 0
+        )
+        print(
+            f"{result['engine']:>11} n={result['num_agents']:<8} "
+            f"k={result['avg_node_degree']:<3} {ratios}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark DisinformationModel construction and stepping."
+    )
+    parser.add_argument(
+        "--num-agents", default="100,1000,10000,100000,1000000",
+        help="Comma-separated population sizes",
+    )
+    parser.add_argument(
+        "--degrees", default="3,8", help="Comma-separated avg_node_degree"
+    )
+    parser.add_argument(
+        "--engines", default=",".join(CONFIGS),
+        help=f"Comma-separated configurations out of {', '.join(CONFIGS)}",
+    )
+    parser.add_argument(
+        "--agents-limit", type=int, default=100000,
+        help="Skip the per-agent engines above this population size",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=1800,
+        help="Seconds before a case is abandoned",
+    )
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="JSON file to write")
+    parser.add_argument(
+        "--compare", default=None, help="Earlier results JSON to compare with"
+    )
+    args = parser.parse_args(argv)
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in CONFIGS:
+            parser.error(f"unknown configuration: {engine}")
+
+    results = []
+    for num_agents in map(int, args.num_agents.split(",")):
+        for degree in map(float, args.degrees.split(",")):
+            for engine in engines:
+                agents = CONFIGS[engine]["engine"] == "agents"
+                if agents and num_agents > args.agents_limit:
+                    continue
+                result = run_case({
+                    "engine": engine,
+                    "num_agents": num_agents,
+                    "avg_node_degree": degree,
+                    "steps": args.steps,
+                    "seed": args.seed,
+                }, args.timeout)
+                results.append(result)
+                if "error" in result:
+                    print(
+                        f"{engine:>11} n={num_agents:<8} k={degree:<4} "
+                        f"failed: {result['error']}"
+                    )
+                    continue
+                print(
+                    f"{engine:>11} n={num_agents:<8} k={degree:<4} "
+                    f"construct {result['construct_s']:.3f}s  "
+                    f"step {result['step_s']:.4f}s  "
+                    f"collect {result['collect_s'] * 1e6:.1f}us  "
+                    f"peak {result['peak_rss_mb']:.0f}MB"
+                )
+
+    commit = git_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as file:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
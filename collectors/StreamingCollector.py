@@ -0,0 +1,174 @@
+import json
+import os
+import weakref
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+COUNTS_FILE = "counts.bin"
+STATES_FILE = "states.bin"
+META_FILE = "meta.json"
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def map_rows(path, dtype, rows, width):
+    # Memory-map the appended rows; np.memmap refuses empty files
+    if rows == 0:
+        return np.empty((0, width), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(rows, width))
+
+
+def load_model_vars(directory):
+    meta = read_meta(directory)
+    counts = map_rows(
+        os.path.join(directory, COUNTS_FILE),
+        np.int64, meta["rows"], len(meta["columns"]),
+    )
+    return pd.DataFrame(counts, columns=meta["columns"], copy=False)
+
+
+def load_agent_states(directory):
+    meta = read_meta(directory)
+    if not meta["agent_states"]:
+        raise ValueError(f"{directory} holds no per-agent state snapshots.")
+    return map_rows(
+        os.path.join(directory, STATES_FILE),
+        np.uint8, meta["rows"], meta["num_agents"],
+    )
+
+
+def write_meta(directory, buffer):
+    meta = {
+        "columns": buffer.columns,
+        "num_agents": buffer.num_agents,
+        "agent_states": buffer.states is not None,
+        "rows": buffer.rows,
+    }
+    with open(
+        os.path.join(directory, META_FILE), "w", encoding="utf-8"
+    ) as file:
+        json.dump(meta, file)
+
+
+def write_pending(directory, buffer):
+    # Module level so the collector's finalizer can flush without keeping
+    # the collector itself alive
+    if buffer.pending == 0:
+        return
+    with open(os.path.join(directory, COUNTS_FILE), "ab") as file:
+        buffer.counts[:buffer.pending].tofile(file)
+    if buffer.states is not None:
+        with open(os.path.join(directory, STATES_FILE), "ab") as file:
+            buffer.states[:buffer.pending].tofile(file)
+    buffer.rows += buffer.pending
+    buffer.pending = 0
+    write_meta(directory, buffer)
+
+
+class StreamingCollector:
+    # Drop-in for DataCollector that appends fixed-size chunks of rows to
+    # flat column files instead of growing Python lists. Pending rows are
+    # written on a full chunk, on flush() or close(), before any get_*,
+    # and when the collector is garbage collected or the interpreter exits
+    def __init__(
+        self,
+        directory,
+        model_reporters,
+        num_agents,
+        agent_states=False,
+        chunk_size=256,
+    ):
+        self.directory = directory
+        self.reporters = list(model_reporters.values())
+        self.chunk_size = chunk_size
+
+        states = None
+        if agent_states:
+            states = np.zeros((chunk_size, num_agents), dtype=np.uint8)
+        self.buffer = SimpleNamespace(
+            columns=list(model_reporters),
+            num_agents=num_agents,
+            counts=np.zeros(
+                (chunk_size, len(model_reporters)), dtype=np.int64
+            ),
+            states=states,
+            pending=0,
+            rows=0,
+        )
+
+        os.makedirs(directory, exist_ok=True)
+        self.reset()
+        self.finalizer = weakref.finalize(
+            self, write_pending, directory, self.buffer
+        )
+
+    @property
+    def columns(self):
+        return self.buffer.columns
+
+    @property
+    def states(self):
+        return self.buffer.states
+
+    @property
+    def pending(self):
+        return self.buffer.pending
+
+    @property
+    def rows(self):
+        return self.buffer.rows
+
+    def reset(self):
+        # Drops every row, written or pending, e.g. before a restore
+        # replays the history it carries
+        self.buffer.pending = 0
+        self.buffer.rows = 0
+        for name in (COUNTS_FILE, STATES_FILE):
+            open(os.path.join(self.directory, name), "wb").close()
+        write_meta(self.directory, self.buffer)
+
+    def collect(self, model):
+        buffer = self.buffer
+        row = buffer.pending
+        buffer.counts[row] = [reporter(model) for reporter in self.reporters]
+        if buffer.states is not None:
+            buffer.states[row] = model.state_codes
+        buffer.pending += 1
+        if buffer.pending == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        write_pending(self.directory, self.buffer)
+
+    def close(self):
+        # Writes the tail of the series; collecting again is still allowed
+        self.flush()
+
+    def append_rows(self, counts, states=None):
+        # Writes already-collected rows straight through, e.g. the history
+        # carried over from a checkpoint
+        if self.states is not None and states is None:
+            raise ValueError(
+                "Agent state snapshots are missing for these rows."
+            )
+        self.flush()
+        with open(os.path.join(self.directory, COUNTS_FILE), "ab") as file:
+            np.asarray(counts, dtype=np.int64).tofile(file)
+        if self.states is not None:
+            with open(os.path.join(self.directory, STATES_FILE), "ab") as file:
+                np.asarray(states, dtype=np.uint8).tofile(file)
+        self.buffer.rows += len(counts)
+        write_meta(self.directory, self.buffer)
+
+    def get_model_vars_dataframe(self):
+        self.flush()
+        return load_model_vars(self.directory)
+
+    def get_agent_states(self):
+        self.flush()
+        return load_agent_states(self.directory)
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+from engines.NumpyEngine import inverse_degree
+from enums.distributions.ScoreTables import ScoreTables
+from enums.transitions.RuleTable import RuleTable
+from enums.State import State
+from graphs.CSRGraph import CSRGraph
+from models.CounterRNG import CounterRNG
+from models.DisinformationModel import (
+    DisinformationModel,
+    generator_params,
+    sample_population,
+)
+
+COLUMNS = [state.name.capitalize() for state in State]
+
+
+def per_replica(value, replicas):
+    # Scalars apply to every replica; a sequence gives one value each,
+    # shaped to broadcast against (replicas, agents) scores
+    value = np.asarray(value, dtype=np.float64)
+    if value.ndim == 0:
+        return float(value)
+    if value.shape != (replicas,):
+        raise ValueError(
+            f"Expected a scalar or {replicas} per-replica values, "
+            f"got shape {value.shape}."
+        )
+    return value[:, None]
+
+
+class EnsembleEngine:
+    # Runs many replicas of DisinformationModel over one shared topology,
+    # holding their states as a replicas x agents matrix
+    def __init__(
+        self,
+        replicas=100,
+        num_agents=100,
+        avg_node_degree=3,
+        initial_outbreak_size=1,
+        initial_exposed_size=15,
+        initial_doubtful_size=15,
+        initial_recovered_size=10,
+
+        age_weight=1.0,
+        education_weight=1.0,
+        sex_weight=1.0,
+
+        threshold_SE=1.5,
+        threshold_EI=1.2,
+        threshold_ED=1.0,
+        threshold_IR=1.3,
+        threshold_DE=1.4,
+        seed=None,
+        noise="stream",
+
+        moderation=0,
+        replica_seeds=None,
+        topology=None,
+        topology_params=None,
+        population=None
+    ):
+        # topology names a generator in graphs.Generators, as for the model,
+        # or is a prebuilt CSRGraph. That and a population (state, age,
+        # education, sex codes, e.g. from a warmed-up model) start every
+        # replica from that snapshot instead of a fresh draw
+        if isinstance(topology, CSRGraph):
+            num_agents = topology.num_nodes
+        else:
+            topology = topology or "erdos_renyi"
+            if topology == "stochastic_block":
+                # Its node order follows each replica's own demographics
+                raise ValueError(
+                    "stochastic_block needs one population layout; pass a "
+                    "model's topology and population instead."
+                )
+        total_initial = (
+            initial_outbreak_size + initial_exposed_size +
+            initial_doubtful_size + initial_recovered_size
+        )
+        if population is None and total_initial > num_agents:
+            raise ValueError(
+                "Initial state counts exceed total number of agents."
+            )
+
+        self.replicas = replicas
+        self.num_agents = num_agents
+        # Thresholds, weights and moderation may differ per replica, so one
+        # ensemble can evaluate a whole batch of parameter sets
+        moderation = per_replica(moderation, replicas)
+        influence = np.where(
+            np.asarray(moderation) != 0,
+            DisinformationModel.MODERATION_INFLUENCE,
+            1.0,
+        )
+        self.threshold_SE = per_replica(threshold_SE, replicas) * influence
+        if np.ndim(self.threshold_SE) == 0:
+            self.threshold_SE = float(self.threshold_SE)
+        self.threshold_EI = per_replica(threshold_EI, replicas)
+        self.threshold_ED = per_replica(threshold_ED, replicas)
+        self.threshold_IR = per_replica(threshold_IR, replicas)
+        self.threshold_DE = per_replica(threshold_DE, replicas)
+        weights = np.broadcast_to(
+            np.stack(np.broadcast_arrays(
+                age_weight, education_weight, sex_weight
+            ), axis=-1),
+            (replicas, 3),
+        )
+        self.score_tables = [ScoreTables(*w) for w in weights.tolist()]
+        self.rules = RuleTable(DisinformationModel.transition_rules)
+
+        # One child stream for the topology, one per replica; replica_seeds
+        # pins the replica streams instead, e.g. for common random numbers
+        root = np.random.SeedSequence(seed)
+        graph_stream, *replica_streams = root.spawn(replicas + 1)
+        self.graph_seed = int(
+            graph_stream.generate_state(2, np.uint64)[0] >> 1
+        )
+        if replica_seeds is not None:
+            if len(replica_seeds) != replicas:
+                raise ValueError(f"Expected {replicas} replica seeds.")
+            replica_streams = replica_seeds
+        self.rngs = [np.random.default_rng(s) for s in replica_streams]
+        # Counter noise is keyed by each replica's seed, as the model's is
+        if noise not in ("stream", "counter"):
+            raise ValueError(f"Unknown noise mode: {noise}")
+        self.counter_rngs = None
+        if noise == "counter":
+            self.counter_rngs = [CounterRNG(s) for s in replica_streams]
+
+        self.topology_spec = None
+        if isinstance(topology, CSRGraph):
+            self.topology = topology
+        else:
+            params = generator_params(
+                topology,
+                num_agents,
+                avg_node_degree,
+                **(topology_params or {}),
+            )
+            self.topology_spec = {
+                "generator": topology,
+                "num_nodes": num_agents,
+                "seed": self.graph_seed,
+                "params": params,
+            }
+            self.topology = DisinformationModel.graph_cache.get(
+                topology, num_agents, self.graph_seed, **params
+            )
+        self.adjacency = self.topology.adjacency()
+        self.inv_degree = inverse_degree(self.topology)
+
+        shape = (replicas, num_agents)
+        if population is not None:
+            state, age, education, sex = population
+            self.state_codes = np.broadcast_to(state, shape).copy()
+            # Demographics never change, so replicas share read-only views
+            self.age_codes = np.broadcast_to(age, shape)
+            self.education_codes = np.broadcast_to(education, shape)
+            self.sex_codes = np.broadcast_to(sex, shape)
+        else:
+            self.state_codes = np.empty(shape, dtype=np.int8)
+            self.age_codes = np.empty(shape, dtype=np.int8)
+            self.education_codes = np.empty(shape, dtype=np.int8)
+            self.sex_codes = np.empty(shape, dtype=np.int8)
+            for r, rng in enumerate(self.rngs):
+                (
+                    self.state_codes[r],
+                    self.age_codes[r],
+                    self.education_codes[r],
+                    self.sex_codes[r],
+                ) = sample_population(
+                    rng,
+                    num_agents,
+                    initial_outbreak_size,
+                    initial_exposed_size,
+                    initial_doubtful_size,
+                    initial_recovered_size,
+                )
+
+        self.steps = 0
+        self.counts = [self.count_states()]
+
+    def count_states(self):
+        # (replicas, states) table of how many agents are in each state
+        return np.stack(
+            [(self.state_codes == state.value).sum(axis=1) for state in State],
+            axis=1,
+        )
+
+    def draw_demographic_scores(self):
+        slots = self.rules.num_slots
+        scores = np.empty(
+            (self.replicas, self.num_agents, slots), dtype=np.float64
+        )
+        agents = np.arange(self.num_agents)
+        for r, (rng, tables) in enumerate(zip(self.rngs, self.score_tables)):
+            if self.counter_rngs is None:
+                noise = tables.draw_noise(rng, (self.num_agents, slots))
+            else:
+                # Numbered like the model's steps, which count from 1
+                noise = tables.draw_keyed_noise(
+                    self.counter_rngs[r], self.steps + 1, agents, slots
+                )
+            scores[r] = tables.demographic_scores(
+                self.state_codes[r, :, None],
+                self.age_codes[r, :, None],
+                self.education_codes[r, :, None],
+                self.sex_codes[r, :, None],
+                noise,
+            )
+        return scores
+
+    def step(self):
+        self.state_codes = self.rules.next_states(
+            self.adjacency,
+            self.inv_degree,
+            self.state_codes,
+            self.draw_demographic_scores(),
+            self,
+        )
+        self.steps += 1
+        self.counts.append(self.count_states())
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+        return self.trajectories()
+
+    def trajectories(self):
+        # (steps + 1, replicas, states)
+        return np.stack(self.counts)
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        counts = self.trajectories()
+        frames = {"mean": counts.mean(axis=1)}
+        for q in quantiles:
+            frames[f"q{q:g}"] = np.quantile(counts, q, axis=1)
+        columns = pd.MultiIndex.from_product(
+            [COLUMNS, list(frames)], names=["state", "statistic"]
+        )
+        data = np.stack(list(frames.values()), axis=2).reshape(len(counts), -1)
+        return pd.DataFrame(data, columns=columns).rename_axis("Step")
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def inverse_degree(topology):
+    degree = topology.degree()
+    inverse = np.zeros(len(degree), dtype=np.float64)
+    np.divide(1.0, degree, out=inverse, where=degree > 0)
+    return inverse
+
+
+class NumpyEngine:
+    def __init__(self, model, topology):
+        self.model = model
+
+        self.adjacency = topology.adjacency()
+        self.inv_degree = inverse_degree(topology)
+        # Only rows of agents that can transition are written or read
+        self.demographic = np.zeros(
+            (topology.num_nodes, model.rules.num_slots), dtype=np.float64
+        )
+
+    def step(self, profiler=None):
+        model = self.model
+        demographic = self.demographic
+        active = model.active_ids()
+        demographic[active] = model.draw_demographic_scores(active)
+        if profiler is not None:
+            profiler.lap("scores")
+        new = model.rules.next_states(
+            self.adjacency,
+            self.inv_degree,
+            model.state_codes,
+            demographic,
+            model,
+        )
+        if profiler is not None:
+            profiler.lap("evaluate")
+        model.commit_states(new)
+        if profiler is not None:
+            profiler.lap("commit")
@@ -0,0 +1,303 @@
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import weakref
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from types import SimpleNamespace
+
+import numpy as np
+from scipy import sparse
+
+from engines.NumpyEngine import inverse_degree
+
+
+def share(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, view
+
+
+def attach(spec):
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def partition(indptr, workers):
+    # Contiguous node ranges holding roughly equal numbers of edges
+    targets = np.linspace(0, indptr[-1], workers + 1)
+    bounds = np.searchsorted(indptr, targets).clip(0, len(indptr) - 1)
+    bounds[0] = 0
+    bounds[-1] = len(indptr) - 1
+    return np.maximum.accumulate(bounds).tolist()
+
+
+def evaluate_partition(
+    specs, lo, hi, params, barrier, stop, busy, index, step, errors,
+):
+    # Any failure is reported to the parent and breaks the barrier, so the
+    # parent raises instead of waiting for this worker forever
+    try:
+        run_partition(specs, lo, hi, params, barrier, stop, busy, index, step)
+    except threading.BrokenBarrierError:
+        # Another worker or the model gave up first; that one reports
+        return
+    except BaseException:
+        errors.put((index, traceback.format_exc()))
+        barrier.abort()
+        raise
+
+
+def run_partition(specs, lo, hi, params, barrier, stop, busy, index, step):
+    blocks, arrays = {}, {}
+    for key, spec in specs.items():
+        blocks[key], arrays[key] = attach(spec)
+
+    indptr = arrays["indptr"]
+    num_nodes = len(indptr) - 1
+    start, end = int(indptr[lo]), int(indptr[hi])
+    adjacency = sparse.csr_array(
+        (
+            np.ones(end - start, dtype=np.float64),
+            arrays["indices"][start:end],
+            indptr[lo:hi + 1] - start,
+        ),
+        shape=(hi - lo, num_nodes),
+    )
+    inv_degree = arrays["inv_degree"][lo:hi]
+    rows = slice(lo, hi)
+    # Signal readiness so start-up cost stays out of the step timings
+    barrier.wait()
+
+    while True:
+        barrier.wait()
+        if stop.value:
+            break
+        started = time.perf_counter()
+        if params.counter_rng is None:
+            demographic = arrays["demographic"][rows]
+        else:
+            # Keyed noise: each worker draws its own rows, and the result
+            # does not depend on where the partition boundaries fall
+            tables = params.score_tables
+            demographic = tables.demographic_scores(
+                arrays["state"][rows, None],
+                arrays["age"][rows, None],
+                arrays["education"][rows, None],
+                arrays["sex"][rows, None],
+                tables.draw_keyed_noise(
+                    params.counter_rng, step.value, np.arange(lo, hi),
+                    params.rules.num_slots,
+                ),
+            )
+        arrays["next"][rows] = params.rules.next_states(
+            adjacency,
+            inv_degree,
+            arrays["state"],
+            demographic,
+            params,
+            rows=rows,
+        )
+        busy[index] += time.perf_counter() - started
+        barrier.wait()
+
+    for block in blocks.values():
+        block.close()
+
+
+def watch(processes, barrier, stop):
+    # Workers that die without reaching the except clause (killed, or a
+    # spawn import failure) still break the barrier
+    wait([process.sentinel for process in processes])
+    if not stop.value:
+        barrier.abort()
+
+
+def shutdown(processes, barrier, stop, blocks, timeout):
+    stop.value = 1
+    if not barrier.broken and all(p.is_alive() for p in processes):
+        try:
+            barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            pass
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+class ParallelEngine:
+    # Each worker owns a contiguous node range and evaluates the rules for
+    # it against shared-memory state; the model commits after a barrier.
+    # timeout bounds how long the model waits for the workers to finish a
+    # step; the workers themselves idle between steps without one
+    def __init__(self, model, topology, workers=None, timeout=600.0):
+        self.model = model
+        self.workers = workers or os.cpu_count()
+        self.timeout = timeout
+
+        num_nodes = topology.num_nodes
+        arrays = {
+            "indptr": np.asarray(topology.indptr),
+            "indices": np.asarray(topology.indices),
+            "inv_degree": inverse_degree(topology),
+            "state": model.state_codes,
+            "next": model.state_codes,
+            "demographic": np.zeros(
+                (num_nodes, model.rules.num_slots), dtype=np.float64
+            ),
+        }
+        if model.counter_rng is not None:
+            arrays["age"] = model.age_codes
+            arrays["education"] = model.education_codes
+            arrays["sex"] = model.sex_codes
+        blocks, specs, self.shared = [], {}, {}
+        for key, array in arrays.items():
+            block, view = share(array)
+            blocks.append(block)
+            self.shared[key] = view
+            specs[key] = (block.name, view.shape, view.dtype)
+
+        # Workers see every threshold attribute the rule table names
+        params = SimpleNamespace(
+            rules=model.rules,
+            score_tables=model.score_tables,
+            counter_rng=model.counter_rng,
+            **{
+                name: getattr(model, name)
+                for name in set(model.rules.thresholds)
+            },
+        )
+        context = multiprocessing.get_context()
+        self.barrier = context.Barrier(self.workers + 1)
+        self.stop = context.Value("b", 0)
+        self.busy = context.Array("d", self.workers)
+        self.step_number = context.Value("q", 0)
+        self.errors = context.SimpleQueue()
+        self.bounds = partition(arrays["indptr"], self.workers)
+        self.processes = [
+            context.Process(
+                target=evaluate_partition,
+                args=(
+                    specs, lo, hi, params,
+                    self.barrier, self.stop, self.busy, index,
+                    self.step_number, self.errors,
+                ),
+                daemon=True,
+            )
+            for index, (lo, hi) in enumerate(
+                zip(self.bounds[:-1], self.bounds[1:])
+            )
+        ]
+        for process in self.processes:
+            process.start()
+        self.finalizer = weakref.finalize(
+            self, shutdown, self.processes, self.barrier, self.stop, blocks,
+            timeout,
+        )
+        threading.Thread(
+            target=watch,
+            args=(self.processes, self.barrier, self.stop),
+            daemon=True,
+        ).start()
+        self.wait()
+
+        self.steps = 0
+        self.wall = 0.0
+        self.scores_wall = 0.0
+        self.evaluate_wall = 0.0
+        self.commit_wall = 0.0
+
+    def wait(self):
+        try:
+            self.barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            error = self.failure()
+            self.close()
+            raise error from None
+
+    def failure(self):
+        reports = {}
+        while not self.errors.empty():
+            index, report = self.errors.get()
+            reports[index] = report
+        for index, process in enumerate(self.processes):
+            if index in reports:
+                return RuntimeError(
+                    f"Parallel worker {index} failed:\n{reports[index]}"
+                )
+            if process.exitcode not in (None, 0):
+                return RuntimeError(
+                    f"Parallel worker {index} exited with code "
+                    f"{process.exitcode}."
+                )
+        return RuntimeError(
+            "Parallel workers stopped or did not finish a step within "
+            f"{self.timeout}s."
+        )
+
+    def step(self, profiler=None):
+        started = time.perf_counter()
+        model = self.model
+        self.shared["state"][:] = model.state_codes
+        if model.counter_rng is None:
+            active = model.active_ids()
+            self.shared["demographic"][active] = (
+                model.draw_demographic_scores(active)
+            )
+        else:
+            self.step_number.value = model.steps
+        if profiler is not None:
+            profiler.lap("scores")
+
+        evaluate = time.perf_counter()
+        self.scores_wall += evaluate - started
+        self.wait()
+        self.wait()
+        commit = time.perf_counter()
+        self.evaluate_wall += commit - evaluate
+        if profiler is not None:
+            profiler.lap("evaluate")
+
+        model.commit_states(self.shared["next"])
+        if profiler is not None:
+            profiler.lap("commit")
+        self.steps += 1
+        finished = time.perf_counter()
+        self.commit_wall += finished - commit
+        self.wall += finished - started
+
+    def scaling(self):
+        # concurrency is how many workers were busy on average during the
+        # evaluate phase, not a speedup over a serial run; the model's own
+        # serial phases (state copy and noise draw, commit) are reported
+        # beside it. Compare wall_s against engine="numpy" for a speedup
+        busy = list(self.busy)
+        concurrency = (
+            sum(busy) / self.evaluate_wall if self.evaluate_wall else 0.0
+        )
+        serial = self.scores_wall + self.commit_wall
+        return {
+            "workers": self.workers,
+            "steps": self.steps,
+            "wall_s": self.wall,
+            "scores_s": self.scores_wall,
+            "evaluate_wall_s": self.evaluate_wall,
+            "commit_s": self.commit_wall,
+            "serial_fraction": serial / self.wall if self.wall else 0.0,
+            "worker_busy_s": busy,
+            "partition_sizes": np.diff(self.bounds).tolist(),
+            "concurrency": concurrency,
+            "efficiency": concurrency / self.workers,
+        }
+
+    def close(self):
+        self.finalizer()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from enums.distributions.AgeDistribution import AgeDistribution
+from enums.distributions.EducationDistribution import EducationDistribution
+from enums.groups.AgeGroup import AgeGroup
+from enums.groups.EducationGroup import EducationGroup
+from enums.State import State
+
+
+def compile_distribution(distribution, groups):
+    table = np.zeros((len(State), len(groups)), dtype=np.float64)
+    for state, row in distribution.items():
+        for group, value in row.items():
+            table[state.value, group.value] = value
+    return table
+
+
+class ScoreTables:
+    # Dense state x group lookups, pre-multiplied by the model weights
+    def __init__(self, age_weight, education_weight, sex_weight):
+        self.age = compile_distribution(AgeDistribution, AgeGroup) * age_weight
+        self.education = (
+            compile_distribution(EducationDistribution, EducationGroup)
+            * education_weight
+        )
+        self.sex_weight = sex_weight
+
+    def draw_noise(self, rng, shape):
+        # One batched draw: age, education and sex multipliers per evaluation
+        return self.scale_noise(rng.random(tuple(shape) + (3,)))
+
+    def draw_keyed_noise(self, counter_rng, step, agents, slots):
+        # The same multipliers from a CounterRNG, addressed by agent id
+        return self.scale_noise(counter_rng.random(step, agents, (slots, 3)))
+
+    def scale_noise(self, noise):
+        # Uniform [0, 1) draws, scaled in place
+        noise[..., :2] *= 0.1
+        noise[..., :2] += 0.9
+        noise[..., 2] *= 0.05
+        noise[..., 2] += 0.05
+        return noise
+
+    def demographic_scores(self, state, age, education, sex, noise):
+        return (
+            self.age[state, age] * noise[..., 0]
+            + self.education[state, education] * noise[..., 1]
+            + sex * self.sex_weight * noise[..., 2]
+        )
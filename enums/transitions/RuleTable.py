@@ -0,0 +1,110 @@
+import numpy as np
+
+from enums.State import State
+from enums.transitions.TransitionRules import TransitionRules
+
+
+class RuleTable:
+    # The rule list compiled to a rules x states sign matrix, rows ordered
+    # by source then priority, so one sparse product scores every rule
+    def __init__(self, rules=TransitionRules):
+        ordered = sorted(rules, key=lambda rule: (rule[0].value, rule[4]))
+        seen = set()
+        for source, _, _, _, priority in ordered:
+            if (source, priority) in seen:
+                raise ValueError(
+                    f"Two {source.name} rules share priority {priority}."
+                )
+            seen.add((source, priority))
+
+        self.sources = np.array([rule[0].value for rule in ordered])
+        self.targets = np.array([rule[1].value for rule in ordered])
+        self.signs = np.zeros((len(ordered), len(State)), dtype=np.float64)
+        for row, (_, _, signs, _, _) in enumerate(ordered):
+            for state, sign in signs.items():
+                self.signs[row, state.value] = sign
+        self.thresholds = [rule[3] for rule in ordered]
+        # Rules often share a sign vector up to its sign (E -> I and E -> D
+        # are exact opposites), so only the distinct ones are multiplied
+        # through the adjacency: rule row = factor * basis[column]
+        basis, self.columns, self.factors = [], [], []
+        for row in self.signs:
+            nonzero = np.flatnonzero(row)
+            factor = np.sign(row[nonzero[0]]) if len(nonzero) else 1.0
+            vector = (row * factor).tolist()
+            if vector not in basis:
+                basis.append(vector)
+            self.columns.append(basis.index(vector))
+            self.factors.append(float(factor))
+        self.basis = np.array(basis, dtype=np.float64).reshape(-1, len(State))
+        # Evaluation slot: position among the rules with the same source
+        self.slots = np.array([
+            (self.sources[:row] == self.sources[row]).sum()
+            for row in range(len(ordered))
+        ])
+        self.num_slots = int(self.slots.max()) + 1 if len(ordered) else 1
+
+        # Per source state: (row, target, threshold, slot) in priority order
+        self.by_state = {state: [] for state in State}
+        for row, rule in enumerate(ordered):
+            self.by_state[rule[0]].append(
+                (row, rule[1], rule[3], int(self.slots[row]))
+            )
+        # States with at least one outgoing rule; the rest are absorbing
+        self.active_states = tuple(
+            state for state in State if self.by_state[state]
+        )
+        # "S->E" style labels, in row order
+        self.names = [
+            f"{rule[0].name[0]}->{rule[1].name[0]}" for rule in ordered
+        ]
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def neighbor_scores(self, adjacency, inv_degree, state):
+        # (..., rows, basis) signed neighbor shares per agent; state is (n,)
+        # or (replicas, n) and adjacency covers rows x n. The signed sums
+        # are whole numbers, so they are exact before dividing by degree
+        vectors = self.basis.T[state]
+        if state.ndim == 1:
+            return (adjacency @ vectors) * inv_degree[:, None]
+        # Replicas side by side as extra columns of a single product
+        replicas, num_nodes = state.shape
+        columns = np.moveaxis(vectors, 0, 1).reshape(num_nodes, -1)
+        sums = (adjacency @ columns).reshape(-1, replicas, len(self.basis))
+        return np.moveaxis(sums, 0, 1) * inv_degree[:, None]
+
+    def next_states(
+        self, adjacency, inv_degree, old, demographic, params, rows=None,
+    ):
+        # demographic holds num_slots evaluations per agent. With rows set,
+        # adjacency, inv_degree and demographic cover only that slice of
+        # agents while old is still the full state vector.
+        current = old if rows is None else old[..., rows]
+        shares = self.neighbor_scores(adjacency, inv_degree, old)
+
+        new = current.copy()
+        for state in self.active_states:
+            # Agents still undecided after the higher-priority rules
+            pending = current == state.value
+            for row, target, threshold, slot in self.by_state[state]:
+                neighbor = shares[..., self.columns[row]]
+                if self.factors[row] < 0:
+                    neighbor = -neighbor
+                score = demographic[..., slot] + neighbor
+                fires = pending & (score > getattr(params, threshold))
+                new[fires] = target.value
+                pending &= ~fires
+        return new
+
+    def next_state(self, state, counts, degree, demographic, params):
+        # Single-agent form for the mesa agents: counts is the neighbor
+        # count per state and demographic the agent's evaluation slots
+        for row, target, threshold, slot in self.by_state[state]:
+            score = demographic[slot]
+            if degree > 0:
+                score += self.signs[row] @ counts / degree
+            if score > getattr(params, threshold):
+                return target
+        return state
@@ -0,0 +1,70 @@
+from enums.State import State
+
+# One row per rule: (source, target, neighbor signs, threshold parameter,
+# priority). Rules sharing a source are tried in priority order and the
+# first to fire wins; each gets its own demographic evaluation slot.
+# Neighbor states left out of the signs count zero.
+TransitionRules = [
+    (
+        State.SUSCEPTIBLE,
+        State.EXPOSED,
+        {
+            State.EXPOSED: +1,
+            State.INFECTED: +1,
+            State.DOUBTFUL: -1,
+            State.RECOVERED: -1,
+        },
+        "threshold_SE",
+        0,
+    ),
+    (
+        State.EXPOSED,
+        State.INFECTED,
+        {
+            State.EXPOSED: +1,
+            State.INFECTED: +1,
+            State.DOUBTFUL: -1,
+            State.RECOVERED: -1,
+        },
+        "threshold_EI",
+        0,
+    ),
+    (
+        State.EXPOSED,
+        State.DOUBTFUL,
+        {
+            State.EXPOSED: -1,
+            State.INFECTED: -1,
+            State.DOUBTFUL: +1,
+            State.RECOVERED: +1,
+        },
+        "threshold_ED",
+        1,
+    ),
+    (
+        State.INFECTED,
+        State.RECOVERED,
+        {
+            State.SUSCEPTIBLE: -1,
+            State.EXPOSED: -1,
+            State.INFECTED: -1,
+            State.DOUBTFUL: +1,
+            State.RECOVERED: +1,
+        },
+        "threshold_IR",
+        0,
+    ),
+    (
+        State.DOUBTFUL,
+        State.EXPOSED,
+        {
+            State.SUSCEPTIBLE: +1,
+            State.EXPOSED: +1,
+            State.INFECTED: +1,
+            State.DOUBTFUL: -1,
+            State.RECOVERED: -1,
+        },
+        "threshold_DE",
+        0,
+    ),
+]
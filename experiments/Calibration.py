@@ -0,0 +1,266 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from experiments.Sensitivity import PARAMETERS
+from experiments.Sweep import COLUMNS, run_tasks
+
+START_FILE = "start.json"
+
+# The warm start this process's tasks continue from, set by use_start
+warm_start = None
+
+
+def save_start(model, directory):
+    # Writes a warm start once, so workers memory-map it instead of
+    # receiving a copy of the graph and population with every batch. A
+    # graph that is already mapped from disk is referenced, not copied
+    from models.Checkpoint import POPULATION, TOPOLOGY_DIR, topology_source
+
+    for name, array in zip(
+        POPULATION,
+        (model.state_codes, model.age_codes, model.education_codes,
+         model.sex_codes),
+    ):
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+    source = topology_source(model.topology, directory)
+    if source is None:
+        model.topology.save(os.path.join(directory, TOPOLOGY_DIR))
+    with open(
+        os.path.join(directory, START_FILE), "w", encoding="utf-8"
+    ) as file:
+        json.dump({"topology_source": source}, file)
+
+
+def use_start(directory):
+    from models.Checkpoint import POPULATION, load_topology
+
+    global warm_start
+    with open(os.path.join(directory, START_FILE), encoding="utf-8") as file:
+        meta = json.load(file)
+    population = tuple(
+        np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in POPULATION
+    )
+    warm_start = (load_topology(directory, meta), population)
+
+
+def distance_batch(task):
+    # RMSE between each candidate's state shares and the observed shares,
+    # over every observed step and column
+    from engines.EnsembleEngine import EnsembleEngine
+
+    names, points, replica_seeds, base, start, observed, columns = task
+    if start:
+        topology, population = warm_start
+        base = {**base, "topology": topology, "population": population}
+    engine = EnsembleEngine(
+        replicas=len(points),
+        **base,
+        **{name: points[:, i] for i, name in enumerate(names)},
+        replica_seeds=replica_seeds,
+    )
+    counts = engine.run(len(observed) - 1)
+    shares = counts[:, :, columns] / engine.num_agents
+    return np.sqrt(((shares - observed[:, None, :]) ** 2).mean(axis=(0, 2)))
+
+
+class CalibrationResult:
+    def __init__(self, names, particles, weights, distances, history):
+        self.names = names
+        self.particles = particles
+        self.weights = weights
+        self.distances = distances
+        # One row per generation: tolerance, acceptances, evaluations, time
+        self.history = pd.DataFrame(history)
+
+    def posterior(self):
+        frame = pd.DataFrame(self.particles, columns=self.names)
+        frame["weight"] = self.weights
+        frame["distance"] = self.distances
+        return frame
+
+    def best_fit(self):
+        return dict(
+            zip(self.names, self.particles[np.argmin(self.distances)].tolist())
+        )
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        # Weighted posterior mean and quantiles per parameter
+        order = np.argsort(self.particles, axis=0)
+        rows = {}
+        for i, name in enumerate(self.names):
+            values = self.particles[order[:, i], i]
+            cumulative = np.cumsum(self.weights[order[:, i]])
+            last = len(values) - 1
+            mean = np.average(self.particles[:, i], weights=self.weights)
+            rows[name] = {
+                "mean": float(mean),
+                **{
+                    f"q{q:g}": float(
+                        values[min(np.searchsorted(cumulative, q), last)]
+                    )
+                    for q in quantiles
+                },
+            }
+        return pd.DataFrame(rows).T
+
+
+class Calibrator:
+    # ABC with sequential Monte Carlo (population Monte Carlo): every
+    # generation tightens the tolerance to a quantile of the last one's
+    # distances and proposes by perturbing weighted accepted particles.
+    # Candidates are scored in parallel ensemble batches; a wall-clock
+    # budget stops it between batches with the best population so far
+    def __init__(
+        self,
+        observed,
+        bounds=None,
+        base=None,
+        start=None,
+        particles=200,
+        batch_size=256,
+        workers=None,
+        quantile=0.5,
+        seed=0,
+    ):
+        # observed: DataFrame of state shares (columns named like the
+        # reporters, e.g. "Infected"), one row per step from step 0
+        self.columns = [COLUMNS.index(column) for column in observed.columns]
+        self.observed = observed.to_numpy(dtype=np.float64)
+        self.bounds = bounds or PARAMETERS
+        self.names = list(self.bounds)
+        self.low = np.array(
+            [low for low, _ in self.bounds.values()], dtype=np.float64
+        )
+        self.high = np.array(
+            [high for _, high in self.bounds.values()], dtype=np.float64
+        )
+        # Every candidate runs on one topology, built from the calibration
+        # seed unless base names its own, so workers hit the graph cache
+        self.base = {"num_agents": 1000, **(base or {})}
+        if self.base.get("seed") is None:
+            self.base["seed"] = seed
+        # A warmed-up DisinformationModel: every candidate continues from
+        # its topology and current states instead of starting over. They
+        # are snapshotted to a scratch directory removed with the calibrator
+        self.start = None
+        if start is not None:
+            self.start = tempfile.mkdtemp(prefix="calibration-start-")
+            weakref.finalize(self, shutil.rmtree, self.start, True)
+            save_start(start, self.start)
+        self.particles = particles
+        self.batch_size = batch_size
+        self.workers = workers
+        self.quantile = quantile
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.evaluations = 0
+
+    def distances(self, points):
+        tasks = []
+        for begin in range(0, len(points), self.batch_size):
+            batch = points[begin:begin + self.batch_size]
+            seeds = [
+                [self.seed, self.evaluations + begin + i]
+                for i in range(len(batch))
+            ]
+            tasks.append((
+                self.names, batch, seeds, self.base,
+                self.start is not None, self.observed, self.columns,
+            ))
+        self.evaluations += len(points)
+        setup = {}
+        if self.start is not None:
+            setup = {"initializer": use_start, "initargs": (self.start,)}
+        return np.concatenate(list(run_tasks(
+            tasks, self.workers, function=distance_batch, **setup
+        )))
+
+    def propose(self, particles, weights, count):
+        # Gaussian kernel at twice the weighted covariance, redrawn until
+        # inside the prior box
+        covariance = 2 * np.atleast_2d(
+            np.cov(particles, rowvar=False, aweights=weights)
+        )
+        covariance += np.eye(len(self.names)) * 1e-12
+        proposals = np.empty((0, len(self.names)))
+        while len(proposals) < count:
+            parents = self.rng.choice(len(particles), size=count, p=weights)
+            moved = self.rng.multivariate_normal(
+                np.zeros(len(self.names)), covariance, size=count,
+            ) + particles[parents]
+            inside = ((moved >= self.low) & (moved <= self.high)).all(axis=1)
+            proposals = np.concatenate([proposals, moved[inside]])
+        return proposals[:count], covariance
+
+    def run(self, generations=10, budget=None, tolerance=0.0):
+        # budget is in seconds; the generation in flight when it runs out
+        # is dropped unless it already has a full population
+        started = time.perf_counter()
+        batch = self.batch_size * (self.workers or os.cpu_count())
+
+        def remaining():
+            return budget is None or time.perf_counter() - started < budget
+
+        # Generation 0: keep the closest particles of a prior sample
+        points = self.low + self.rng.random(
+            (max(batch, 2 * self.particles), len(self.names))
+        ) * (self.high - self.low)
+        found = self.distances(points)
+        best = np.argsort(found)[:self.particles]
+        particles, distances = points[best], found[best]
+        weights = np.full(len(particles), 1 / len(particles))
+        history = [{
+            "generation": 0,
+            "epsilon": float(distances.max()),
+            "accepted": len(particles),
+            "evaluations": self.evaluations,
+            "seconds": time.perf_counter() - started,
+        }]
+
+        for generation in range(1, generations):
+            epsilon = float(np.quantile(distances, self.quantile))
+            if epsilon <= tolerance or not remaining():
+                break
+            accepted = np.empty((0, len(self.names)))
+            accepted_distances = np.empty(0)
+            while len(accepted) < self.particles and remaining():
+                points, covariance = self.propose(particles, weights, batch)
+                found = self.distances(points)
+                keep = found <= epsilon
+                accepted = np.concatenate([accepted, points[keep]])
+                accepted_distances = np.concatenate(
+                    [accepted_distances, found[keep]]
+                )
+            if len(accepted) < self.particles:
+                break
+            accepted = accepted[:self.particles]
+            accepted_distances = accepted_distances[:self.particles]
+
+            # Uniform prior: weight is 1 / sum_j w_j K(theta | theta_j)
+            precision = np.linalg.inv(covariance)
+            diff = accepted[:, None, :] - particles[None, :, :]
+            kernel = np.exp(
+                -0.5 * np.einsum("ijk,kl,ijl->ij", diff, precision, diff)
+            )
+            weights = 1 / (kernel @ weights)
+            weights /= weights.sum()
+            particles, distances = accepted, accepted_distances
+            history.append({
+                "generation": generation,
+                "epsilon": epsilon,
+                "accepted": len(particles),
+                "evaluations": self.evaluations,
+                "seconds": time.perf_counter() - started,
+            })
+
+        return CalibrationResult(
+            self.names, particles, weights, distances, history
+        )
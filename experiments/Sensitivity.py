@@ -0,0 +1,254 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from enums.State import State
+from experiments.Sweep import run_tasks
+
+# Default ranges for the parameters under study
+PARAMETERS = {
+    "threshold_SE": (0.5, 2.5),
+    "threshold_EI": (0.5, 2.5),
+    "threshold_ED": (0.5, 2.5),
+    "threshold_IR": (0.5, 2.5),
+    "threshold_DE": (0.5, 2.5),
+    "age_weight": (0.0, 2.0),
+    "education_weight": (0.0, 2.0),
+    "sex_weight": (0.0, 1.0),
+}
+OUTPUTS = ["peak_infected", "time_to_peak"] + [
+    f"final_{state.name.lower()}" for state in State
+]
+# Outputs whose spread is below this fraction of their magnitude count as
+# constant; dividing by their variance would only amplify rounding noise
+CONSTANT_TOLERANCE = 1e-9
+
+
+def reduce_outputs(counts, num_agents):
+    # (steps + 1, replicas, states) counts -> (replicas, outputs) of peak
+    # infected share, its step and the final share of every state
+    infected = counts[:, :, State.INFECTED.value]
+    return np.column_stack(
+        [
+            infected.max(axis=0) / num_agents,
+            infected.argmax(axis=0),
+            counts[-1] / num_agents,
+        ]
+    ).astype(np.float64)
+
+
+def evaluate_batch(task):
+    from engines.EnsembleEngine import EnsembleEngine
+
+    names, points, replica_seeds, base, steps, seed = task
+    engine = EnsembleEngine(
+        replicas=len(points),
+        **base,
+        **{name: points[:, i] for i, name in enumerate(names)},
+        seed=seed,
+        replica_seeds=replica_seeds,
+    )
+    return reduce_outputs(engine.run(steps), engine.num_agents)
+
+
+def evaluate(
+    names, points, replica_seeds, base=None, steps=100, batch_size=256,
+    workers=None, seed=0,
+):
+    # Each batch of parameter sets runs as one ensemble over the shared
+    # topology; only the reduced outputs come back from the workers
+    base = {"num_agents": 1000, **(base or {})}
+    tasks = [
+        (
+            names,
+            points[start:start + batch_size],
+            replica_seeds[start:start + batch_size],
+            base,
+            steps,
+            seed,
+        )
+        for start in range(0, len(points), batch_size)
+    ]
+    return np.concatenate(
+        list(run_tasks(tasks, workers, function=evaluate_batch))
+    )
+
+
+def constant_outputs(outputs, method):
+    # (evaluations, outputs) -> mask of outputs with no usable variance,
+    # whose indices are reported as NaN
+    magnitude = np.abs(outputs).max(axis=0)
+    constant = outputs.std(axis=0) <= CONSTANT_TOLERANCE * magnitude
+    if constant.any():
+        names = ", ".join(np.array(OUTPUTS)[constant])
+        warnings.warn(
+            f"{method} indices are undefined for constant outputs: {names}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+    return constant
+
+
+def scale(unit, bounds):
+    low = np.array([b[0] for b in bounds.values()], dtype=np.float64)
+    high = np.array([b[1] for b in bounds.values()], dtype=np.float64)
+    return low + unit * (high - low)
+
+
+def morris_design(num_params, trajectories, levels=4, seed=None):
+    # One-at-a-time trajectories on a levels-point grid in the unit cube:
+    # (trajectories * (k + 1), k) points plus, per move, which parameter
+    # changed and by how much
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    points = np.empty((trajectories, num_params + 1, num_params))
+    moved = np.empty((trajectories, num_params), dtype=np.int64)
+    steps = np.empty((trajectories, num_params))
+    for t in range(trajectories):
+        x = rng.integers(levels // 2, size=num_params) / (levels - 1)
+        points[t, 0] = x
+        for j, i in enumerate(rng.permutation(num_params)):
+            step = delta if x[i] + delta <= 1 else -delta
+            x = x.copy()
+            x[i] += step
+            points[t, j + 1] = x
+            moved[t, j] = i
+            steps[t, j] = step
+    return points.reshape(-1, num_params), moved, steps
+
+
+def saltelli_design(num_params, samples, seed=None):
+    # A, B and the k matrices AB_i (A with column i taken from B), stacked
+    # as (samples * (k + 2), k) unit-cube points
+    sampler = qmc.Sobol(d=2 * num_params, scramble=True, seed=seed)
+    base = sampler.random(samples)
+    a, b = base[:, :num_params], base[:, num_params:]
+    blocks = [a, b]
+    for i in range(num_params):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    return np.concatenate(blocks)
+
+
+def bootstrap_interval(statistic, groups, resamples, confidence, rng):
+    # Percentile interval of statistic(indices) over resampled groups
+    draws = np.array([
+        statistic(rng.integers(groups, size=groups))
+        for _ in range(resamples)
+    ])
+    tail = (1 - confidence) / 2
+    return np.quantile(draws, [tail, 1 - tail], axis=0)
+
+
+def morris_indices(outputs, moved, steps, names, resamples, confidence, seed):
+    trajectories, num_params = moved.shape
+    constant = constant_outputs(outputs, "Morris")
+    y = outputs.reshape(trajectories, num_params + 1, -1)
+    effects = np.empty((trajectories, num_params, y.shape[2]))
+    for t in range(trajectories):
+        change = (y[t, 1:] - y[t, :-1]) / steps[t, :, None]
+        effects[t, moved[t]] = change
+
+    def mu_star(rows):
+        return np.abs(effects[rows]).mean(axis=0)
+
+    low, high = bootstrap_interval(
+        mu_star, trajectories, resamples, confidence,
+        np.random.default_rng(seed),
+    )
+    columns = {
+        "mu": effects.mean(axis=0),
+        "mu_star": mu_star(np.arange(trajectories)),
+        "mu_star_low": low,
+        "mu_star_high": high,
+        "sigma": effects.std(axis=0, ddof=1),
+    }
+    for key, value in columns.items():
+        columns[key] = np.where(constant, np.nan, value)
+    return indices_frame(columns, names)
+
+
+def sobol_indices(outputs, samples, names, resamples, confidence, seed):
+    # First-order (Saltelli 2010) and total (Jansen) estimators
+    num_params = len(names)
+    constant = constant_outputs(outputs, "Sobol")
+    y = outputs.reshape(num_params + 2, samples, -1)
+    f_a, f_b, f_ab = y[0], y[1], y[2:]
+
+    def indices(rows):
+        a, b, ab = f_a[rows], f_b[rows], f_ab[:, rows]
+        variance = np.concatenate([a, b]).var(axis=0)
+        variance = np.where(constant, np.nan, variance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first = (b * (ab - a)).mean(axis=1) / variance
+            total = 0.5 * ((a - ab) ** 2).mean(axis=1) / variance
+        return np.stack([first, total])
+
+    rng = np.random.default_rng(seed)
+    low, high = bootstrap_interval(
+        indices, samples, resamples, confidence, rng
+    )
+    estimate = indices(np.arange(samples))
+    columns = {
+        "S1": estimate[0],
+        "S1_low": low[0],
+        "S1_high": high[0],
+        "ST": estimate[1],
+        "ST_low": low[1],
+        "ST_high": high[1],
+    }
+    return indices_frame(columns, names)
+
+
+def indices_frame(columns, names):
+    # (parameters, outputs) arrays -> rows indexed by (output, parameter)
+    index = pd.MultiIndex.from_product(
+        [OUTPUTS, names], names=["output", "parameter"]
+    )
+    return pd.DataFrame(
+        {key: value.T.reshape(-1) for key, value in columns.items()},
+        index=index,
+    )
+
+
+def morris(
+    bounds=None, trajectories=20, levels=4, base=None, steps=100,
+    batch_size=256, workers=None, seed=0, resamples=1000, confidence=0.95,
+):
+    bounds = bounds or PARAMETERS
+    names = list(bounds)
+    unit, moved, moves = morris_design(len(names), trajectories, levels, seed)
+    # Common random numbers: a trajectory's points share one replica seed
+    replica_seeds = [
+        [seed, t] for t in range(trajectories) for _ in range(len(names) + 1)
+    ]
+    outputs = evaluate(
+        names, scale(unit, bounds), replica_seeds, base, steps,
+        batch_size, workers, seed,
+    )
+    return morris_indices(
+        outputs, moved, moves, names, resamples, confidence, seed
+    )
+
+
+def sobol(
+    bounds=None, samples=1024, base=None, steps=100, batch_size=256,
+    workers=None, seed=0, resamples=1000, confidence=0.95,
+):
+    # samples * (k + 2) evaluations; a power of two keeps the Sobol
+    # sequence balanced
+    bounds = bounds or PARAMETERS
+    names = list(bounds)
+    unit = saltelli_design(len(names), samples, seed)
+    # Row j of A, B and every AB_i shares replica seed j
+    replica_seeds = [
+        [seed, j] for _ in range(len(names) + 2) for j in range(samples)
+    ]
+    outputs = evaluate(
+        names, scale(unit, bounds), replica_seeds, base, steps,
+        batch_size, workers, seed,
+    )
+    return sobol_indices(outputs, samples, names, resamples, confidence, seed)
@@ -0,0 +1,203 @@
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from enums.State import State
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Everything a trajectory depends on; editing any of it invalidates the cache
+SOURCE_DIRS = ("agents", "engines", "enums", "graphs", "models")
+COLUMNS = [state.name.capitalize() for state in State]
+
+CODE_VERSION = None
+
+
+def code_version():
+    global CODE_VERSION
+    if CODE_VERSION is None:
+        digest = hashlib.blake2b(digest_size=8)
+        for directory in SOURCE_DIRS:
+            top = os.path.join(ROOT, directory)
+            for base, dirs, files in os.walk(top):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".py"):
+                        path = os.path.join(base, name)
+                        digest.update(os.path.relpath(path, ROOT).encode())
+                        with open(path, "rb") as file:
+                            digest.update(file.read())
+        CODE_VERSION = digest.hexdigest()
+    return CODE_VERSION
+
+
+def grid(**axes):
+    # Full factorial design: grid(threshold_SE=[1, 1.5], moderation=[0, 1])
+    names = list(axes)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(axes[name] for name in names))
+    ]
+
+
+def latin_hypercube(samples, bounds, seed=None):
+    # One stratum per sample on every axis; integer bounds give integers
+    rng = np.random.default_rng(seed)
+    design = [{} for _ in range(samples)]
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        values = low + strata * (high - low)
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.floor(low + strata * (high - low + 1)).astype(int)
+        for point, value in zip(design, values.tolist()):
+            point[name] = value
+    return design
+
+
+def run_key(params, seed, steps):
+    payload = json.dumps(
+        {
+            "params": params,
+            "seed": seed,
+            "steps": steps,
+            "version": code_version(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    # One .npy trajectory per run, named by its key and fanned out over
+    # 256 subdirectories
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.npy")
+
+    def get(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        return np.load(path)
+
+    def put(self, key, counts):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent sweeps never read half a file
+        handle, scratch = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(handle, "wb") as file:
+            np.save(file, counts)
+        os.replace(scratch, path)
+
+
+def simulate(params, seed, steps):
+    # (steps + 1, states) counts for one run; stops early if the model does
+    from models.DisinformationModel import DisinformationModel
+
+    model = DisinformationModel(**params, seed=seed)
+    while model.running and model.steps < steps:
+        model.step()
+    model.close()
+    frame = model.datacollector.get_model_vars_dataframe()
+    return frame[COLUMNS].to_numpy(dtype=np.int64)
+
+
+def simulate_task(task):
+    return simulate(*task)
+
+
+def run_tasks(
+    tasks, workers=None, graph_cache_dir=None, function=None,
+    initializer=None, initargs=(),
+):
+    # Yields results in task order, so callers can cache each one as it
+    # arrives; function and initializer must be importable by the worker
+    # processes. initializer(*initargs) runs once per worker, e.g. to
+    # memory-map inputs every task shares instead of pickling them in
+    function = function or simulate_task
+    setup = (graph_cache_dir, initializer, initargs)
+    if workers == 1 or len(tasks) <= 1:
+        initialize(*setup)
+        yield from map(function, tasks)
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initialize, initargs=setup
+    ) as pool:
+        yield from pool.map(
+            function, tasks,
+            chunksize=max(1, len(tasks) // (4 * workers)),
+        )
+
+
+def initialize(graph_cache_dir, initializer, initargs):
+    if graph_cache_dir:
+        use_graph_cache(graph_cache_dir)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def use_graph_cache(directory):
+    from graphs.GraphCache import GraphCache
+    from models.DisinformationModel import DisinformationModel
+
+    DisinformationModel.graph_cache = GraphCache(directory=directory)
+
+
+def sweep(
+    design,
+    seeds=(0,),
+    steps=100,
+    base=None,
+    workers=None,
+    cache_dir=None,
+    graph_cache_dir=None,
+):
+    # Runs every design point for every seed and returns one row per run
+    # and step. base holds the fixed model arguments (num_agents, engine,
+    # ...); the numpy engine on compact agents is the default. A "seed" in
+    # a design point or in base replaces the replicate seeds for that point
+    base = {"engine": "numpy", "compact": True, **(base or {})}
+    cache = ResultCache(cache_dir) if cache_dir else None
+
+    runs = []
+    for point in design:
+        params = {**base, **point}
+        point_seeds = (params.pop("seed"),) if "seed" in params else seeds
+        point = {k: v for k, v in point.items() if k != "seed"}
+        runs.extend((params, point, seed) for seed in point_seeds)
+    results = [None] * len(runs)
+    missing = []
+    for index, (params, _, seed) in enumerate(runs):
+        if cache is not None:
+            results[index] = cache.get(run_key(params, seed, steps))
+        if results[index] is None:
+            missing.append(index)
+
+    tasks = [(runs[i][0], runs[i][2], steps) for i in missing]
+    computed = run_tasks(tasks, workers, graph_cache_dir)
+    for index, counts in zip(missing, computed):
+        results[index] = counts
+        if cache is not None:
+            params, _, seed = runs[index]
+            cache.put(run_key(params, seed, steps), counts)
+
+    frames = []
+    for run, ((_, point, seed), counts) in enumerate(zip(runs, results)):
+        frame = pd.DataFrame(counts, columns=COLUMNS)
+        frame.insert(0, "Step", np.arange(len(counts)))
+        frame.insert(0, "seed", seed)
+        for name, value in reversed(list(point.items())):
+            frame.insert(0, name, value)
+        frame.insert(0, "run", run)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["run", "seed", "Step"] + COLUMNS)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,511 @@
+import argparse
+import ast
+import os
+import sys
+import time
+
+# Headless entry point: only the model and its data path are imported here,
+# never solara or mesa.visualization. networkx still comes in with mesa
+# itself, so it is not avoided either
+
+# The model packages live next to fakenews at the repository root; put it
+# on the path so `python path/to/fakenews` works from any directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+COLUMN_NAMES = ["Susceptible", "Exposed", "Infected", "Doubtful", "Recovered"]
+GENERATORS = [
+    "erdos_renyi", "barabasi_albert", "watts_strogatz", "configuration",
+    "stochastic_block",
+]
+
+
+def add_model_arguments(parser):
+    parser.add_argument("--num-agents", type=int, default=100)
+    parser.add_argument("--avg-node-degree", type=float, default=3)
+    parser.add_argument("--initial-outbreak-size", type=int, default=1)
+    parser.add_argument("--initial-exposed-size", type=int, default=15)
+    parser.add_argument("--initial-doubtful-size", type=int, default=15)
+    parser.add_argument("--initial-recovered-size", type=int, default=10)
+    parser.add_argument("--age-weight", type=float, default=1.0)
+    parser.add_argument("--education-weight", type=float, default=1.0)
+    parser.add_argument("--sex-weight", type=float, default=1.0)
+    parser.add_argument("--threshold-SE", type=float, default=1.5)
+    parser.add_argument("--threshold-EI", type=float, default=1.2)
+    parser.add_argument("--threshold-ED", type=float, default=1.0)
+    parser.add_argument("--threshold-IR", type=float, default=1.3)
+    parser.add_argument("--threshold-DE", type=float, default=1.4)
+    parser.add_argument("--moderation", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--noise", choices=["stream", "counter"], default="stream",
+        help="counter: order-independent noise keyed by seed, step and agent",
+    )
+
+
+def add_topology_arguments(parser, generators):
+    parser.add_argument(
+        "--topology", choices=generators, default="erdos_renyi"
+    )
+    parser.add_argument(
+        "--topology-param", action="append", default=[], metavar="KEY=VALUE",
+        help="Generator parameter, e.g. homophily=20 or group_by=age",
+    )
+
+
+def model_kwargs(args):
+    return {
+        "num_agents": args.num_agents,
+        "avg_node_degree": args.avg_node_degree,
+        "initial_outbreak_size": args.initial_outbreak_size,
+        "initial_exposed_size": args.initial_exposed_size,
+        "initial_doubtful_size": args.initial_doubtful_size,
+        "initial_recovered_size": args.initial_recovered_size,
+        "age_weight": args.age_weight,
+        "education_weight": args.education_weight,
+        "sex_weight": args.sex_weight,
+        "threshold_SE": args.threshold_SE,
+        "threshold_EI": args.threshold_EI,
+        "threshold_ED": args.threshold_ED,
+        "threshold_IR": args.threshold_IR,
+        "threshold_DE": args.threshold_DE,
+        "moderation": args.moderation,
+        "seed": args.seed,
+        "noise": args.noise,
+    }
+
+
+def parse_topology_params(pairs):
+    params = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
+
+
+def run(args):
+    from models.DisinformationModel import DisinformationModel
+    from graphs.GraphCache import GraphCache
+
+    if args.graph_cache:
+        DisinformationModel.graph_cache = GraphCache(directory=args.graph_cache)
+
+    start = time.perf_counter()
+    if args.resume:
+        # The checkpoint carries every model argument; only where the
+        # continuation streams its data can change
+        overrides = {"output_dir": args.out} if args.out else {}
+        model = DisinformationModel.restore(args.resume, **overrides)
+    else:
+        topology = args.topology
+        if args.edge_list:
+            from graphs.EdgeListLoader import load_edge_list
+
+            topology = load_edge_list(
+                args.edge_list,
+                cache_dir=args.edge_list_cache,
+                binary_dtype=args.binary_dtype,
+            )
+        model = DisinformationModel(
+            **model_kwargs(args),
+            topology=topology,
+            topology_params=parse_topology_params(args.topology_param),
+            engine=args.engine,
+            update=args.update,
+            workers=args.workers,
+            compact=args.compact,
+            output_dir=args.out,
+            agent_states=args.agent_states,
+            convergence_window=args.convergence_window,
+            profile=bool(args.profile),
+        )
+    built = time.perf_counter()
+    while model.running and model.steps < args.steps:
+        model.step()
+        if args.checkpoint_every and model.steps % args.checkpoint_every == 0:
+            model.checkpoint(args.checkpoint)
+    if args.checkpoint:
+        model.checkpoint(args.checkpoint)
+    finished = time.perf_counter()
+
+    results = model.datacollector.get_model_vars_dataframe()
+    elapsed = finished - built
+    print(f"construction: {built - start:.3f}s")
+    rate = model.steps / elapsed if elapsed > 0 else float("inf")
+    print(f"steps: {model.steps} in {elapsed:.3f}s ({rate:.1f} steps/s)")
+    if model.converged_step is not None:
+        print(f"converged at step {model.converged_step}")
+    if model.engine == "parallel":
+        scaling = model.step_engine.scaling()
+        print(
+            f"parallel: {scaling['workers']} workers, "
+            f"concurrency {scaling['concurrency']:.2f}, "
+            f"efficiency {scaling['efficiency']:.0%}, "
+            f"serial fraction {scaling['serial_fraction']:.0%}"
+        )
+    model.close()
+    if model.profiler is not None:
+        model.profiler.to_jsonl(args.profile)
+        profile = model.profiler.dataframe()
+        print(f"profile written to {args.profile}")
+        print(profile.mean().to_string())
+    print(results.iloc[-1].to_string())
+    return 0
+
+
+def ensemble(args):
+    from engines.EnsembleEngine import EnsembleEngine
+
+    start = time.perf_counter()
+    engine = EnsembleEngine(
+        replicas=args.replicas,
+        **model_kwargs(args),
+        topology=args.topology,
+        topology_params=parse_topology_params(args.topology_param),
+    )
+    built = time.perf_counter()
+    engine.run(args.steps)
+    finished = time.perf_counter()
+
+    summary = engine.summary()
+    print(f"construction: {built - start:.3f}s")
+    print(
+        f"{args.replicas} replicas x {args.steps} steps "
+        f"in {finished - built:.3f}s"
+    )
+    if args.out:
+        summary.to_csv(args.out)
+    print(summary.iloc[-1].unstack().to_string())
+    return 0
+
+
+def parse_values(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def sweep(args):
+    from experiments.Sweep import grid, latin_hypercube, sweep as run_sweep
+
+    axes = {}
+    for pair in args.grid:
+        name, _, values = pair.partition("=")
+        axes[name] = [parse_values(value) for value in values.split(",")]
+    bounds = {}
+    for pair in args.range:
+        name, _, values = pair.partition("=")
+        low, _, high = values.partition(":")
+        bounds[name] = (parse_values(low), parse_values(high))
+    if bool(axes) == bool(bounds):
+        raise SystemExit("Give either --grid or --range (with --samples).")
+    if axes:
+        design = grid(**axes)
+    else:
+        design = latin_hypercube(args.samples, bounds, seed=args.design_seed)
+
+    base = model_kwargs(args)
+    del base["seed"]
+    base.update(engine=args.engine, compact=args.engine != "agents")
+    start = time.perf_counter()
+    results = run_sweep(
+        design,
+        seeds=range(args.seeds),
+        steps=args.steps,
+        base=base,
+        workers=args.workers,
+        cache_dir=args.cache,
+        graph_cache_dir=args.graph_cache,
+    )
+    print(
+        f"{len(design)} points x {args.seeds} seeds "
+        f"in {time.perf_counter() - start:.3f}s"
+    )
+    if args.out:
+        results.to_csv(args.out, index=False)
+    final = results.groupby("run").tail(1)
+    print(final.to_string(index=False, max_rows=20))
+    return 0
+
+
+def sensitivity(args):
+    from experiments.Sensitivity import PARAMETERS, morris, sobol
+
+    bounds = PARAMETERS
+    if args.param:
+        bounds = {}
+        for pair in args.param:
+            name, _, values = pair.partition("=")
+            low, _, high = values.partition(":")
+            if high:
+                bounds[name] = (float(low), float(high))
+            else:
+                bounds[name] = PARAMETERS[name]
+    base = model_kwargs(args)
+    for name in ("seed", *bounds):
+        del base[name]
+
+    options = {
+        "bounds": bounds,
+        "base": base,
+        "steps": args.steps,
+        "batch_size": args.batch_size,
+        "workers": args.workers,
+        "seed": args.seed or 0,
+        "resamples": args.resamples,
+    }
+    start = time.perf_counter()
+    if args.method == "morris":
+        indices = morris(trajectories=args.samples or 20, **options)
+    else:
+        indices = sobol(samples=args.samples or 1024, **options)
+    print(f"{args.method}: {time.perf_counter() - start:.3f}s")
+    if args.out:
+        indices.to_csv(args.out)
+    print(indices.round(3).to_string())
+    return 0
+
+
+def calibrate(args):
+    import pandas as pd
+
+    from experiments.Calibration import Calibrator
+    from experiments.Sensitivity import PARAMETERS
+
+    start = None
+    if args.start:
+        from models.DisinformationModel import DisinformationModel
+
+        start = DisinformationModel.restore(args.start)
+    # The warm start fixes the population; otherwise only --num-agents does
+    population = start.num_agents if start is not None else args.num_agents
+
+    observed = pd.read_csv(args.observed)
+    observed = observed[[c for c in observed.columns if c in COLUMN_NAMES]]
+    if observed.to_numpy().max() > 1:
+        # Counts rather than shares
+        if population is None:
+            raise SystemExit(
+                "The observed data holds counts; give --start or "
+                "--num-agents to convert them to shares."
+            )
+        observed = observed / population
+    bounds = {}
+    for pair in args.param or ["threshold_SE", "threshold_EI"]:
+        name, _, values = pair.partition("=")
+        low, _, high = values.partition(":")
+        if high:
+            bounds[name] = (float(low), float(high))
+        else:
+            bounds[name] = PARAMETERS[name]
+    base = model_kwargs(args)
+    base["num_agents"] = population or 100
+    for name in ("seed", *bounds):
+        del base[name]
+
+    calibrator = Calibrator(
+        observed,
+        bounds=bounds,
+        base=base,
+        start=start,
+        particles=args.particles,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        seed=args.seed or 0,
+    )
+    result = calibrator.run(
+        generations=args.generations, budget=args.budget
+    )
+    print(result.history.to_string(index=False))
+    print(result.summary().to_string())
+    print(f"best fit: {result.best_fit()}")
+    if args.out:
+        result.posterior().to_csv(args.out, index=False)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fakenews")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser(
+        "run", help="Run a single DisinformationModel without the dashboard"
+    )
+    add_model_arguments(run_parser)
+    run_parser.add_argument(
+        "--engine", choices=["agents", "numpy", "parallel"], default="agents"
+    )
+    run_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes for the parallel engine",
+    )
+    run_parser.add_argument(
+        "--update", choices=["async", "sync"], default=None,
+        help="Default: async for the agents engine, sync otherwise",
+    )
+    run_parser.add_argument(
+        "--compact", action="store_true",
+        help="Keep agents only as arrays (numpy/parallel engines)",
+    )
+    run_parser.add_argument("--steps", type=int, default=100)
+    run_parser.add_argument(
+        "--out", default=None,
+        help="Directory to stream collected data to",
+    )
+    run_parser.add_argument("--agent-states", action="store_true")
+    run_parser.add_argument("--convergence-window", type=int, default=None)
+    run_parser.add_argument(
+        "--graph-cache", default=None,
+        help="Directory for persisted topologies",
+    )
+    add_topology_arguments(run_parser, GENERATORS)
+    run_parser.add_argument(
+        "--edge-list", default=None,
+        help="Edge list file to use as the network (overrides --num-agents)",
+    )
+    run_parser.add_argument(
+        "--edge-list-cache", default=None,
+        help="Directory for the converted CSR (default: <edge-list>.csr)",
+    )
+    run_parser.add_argument(
+        "--binary-dtype", default=None,
+        help="Read the edge list as raw (src, dst) pairs of this dtype",
+    )
+    run_parser.add_argument(
+        "--profile", default=None, metavar="PATH",
+        help="Record per-step phase timings and rule counts as JSON lines",
+    )
+    run_parser.add_argument(
+        "--checkpoint", default=None,
+        help="Directory to checkpoint the model to when the run ends",
+    )
+    run_parser.add_argument(
+        "--checkpoint-every", type=int, default=None,
+        help="Also checkpoint every N steps (needs --checkpoint)",
+    )
+    run_parser.add_argument(
+        "--resume", default=None,
+        help="Continue from a checkpoint up to --steps total steps",
+    )
+    run_parser.set_defaults(handler=run)
+
+    ensemble_parser = commands.add_parser(
+        "ensemble", help="Run many replicas over one shared topology"
+    )
+    add_model_arguments(ensemble_parser)
+    # Replicas draw their own populations, so none shares a block layout
+    add_topology_arguments(
+        ensemble_parser,
+        [name for name in GENERATORS if name != "stochastic_block"],
+    )
+    ensemble_parser.add_argument("--replicas", type=int, default=100)
+    ensemble_parser.add_argument("--steps", type=int, default=100)
+    ensemble_parser.add_argument(
+        "--out", default=None, help="CSV file for the summary trajectories"
+    )
+    ensemble_parser.set_defaults(handler=ensemble)
+
+    sweep_parser = commands.add_parser(
+        "sweep", help="Run a parameter grid or sampled design in parallel"
+    )
+    add_model_arguments(sweep_parser)
+    sweep_parser.add_argument(
+        "--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+        help="Grid axis; repeat for a full factorial design",
+    )
+    sweep_parser.add_argument(
+        "--range", action="append", default=[], metavar="NAME=LOW:HIGH",
+        help="Latin hypercube axis; repeat, and set --samples",
+    )
+    sweep_parser.add_argument("--samples", type=int, default=20)
+    sweep_parser.add_argument("--design-seed", type=int, default=None)
+    sweep_parser.add_argument(
+        "--seeds", type=int, default=1, help="Seeds 0..N-1 per design point"
+    )
+    sweep_parser.add_argument("--steps", type=int, default=100)
+    sweep_parser.add_argument(
+        "--engine", choices=["agents", "numpy"], default="numpy"
+    )
+    sweep_parser.add_argument("--workers", type=int, default=None)
+    sweep_parser.add_argument(
+        "--cache", default=None,
+        help="Directory caching each run's trajectory by content hash",
+    )
+    sweep_parser.add_argument(
+        "--graph-cache", default=None,
+        help="Directory for persisted topologies",
+    )
+    sweep_parser.add_argument(
+        "--out", default=None, help="CSV file for the tidy results"
+    )
+    sweep_parser.set_defaults(handler=sweep)
+
+    sensitivity_parser = commands.add_parser(
+        "sensitivity", help="Morris screening or Sobol indices"
+    )
+    add_model_arguments(sensitivity_parser)
+    sensitivity_parser.add_argument(
+        "--method", choices=["morris", "sobol"], default="morris"
+    )
+    sensitivity_parser.add_argument(
+        "--param", action="append", default=[], metavar="NAME[=LOW:HIGH]",
+        help="Parameter to study (default: thresholds and weights)",
+    )
+    sensitivity_parser.add_argument(
+        "--samples", type=int, default=None,
+        help="Morris trajectories (default 20) or Sobol base samples "
+        "(default 1024)",
+    )
+    sensitivity_parser.add_argument("--steps", type=int, default=100)
+    sensitivity_parser.add_argument("--batch-size", type=int, default=256)
+    sensitivity_parser.add_argument("--workers", type=int, default=None)
+    sensitivity_parser.add_argument("--resamples", type=int, default=1000)
+    sensitivity_parser.add_argument(
+        "--out", default=None, help="CSV file for the indices"
+    )
+    sensitivity_parser.set_defaults(handler=sensitivity)
+
+    calibrate_parser = commands.add_parser(
+        "calibrate", help="Fit parameters to an observed spread curve (ABC)"
+    )
+    add_model_arguments(calibrate_parser)
+    # Unset unless given, so counts are never scaled by a guessed population
+    calibrate_parser.set_defaults(num_agents=None)
+    calibrate_parser.add_argument(
+        "--observed", required=True,
+        help="CSV with one row per step and state columns (e.g. Infected), "
+        "as shares or counts",
+    )
+    calibrate_parser.add_argument(
+        "--param", action="append", default=[], metavar="NAME[=LOW:HIGH]",
+        help="Parameter to fit (default: threshold_SE and threshold_EI)",
+    )
+    calibrate_parser.add_argument(
+        "--start", default=None,
+        help="Checkpoint to warm-start every candidate from",
+    )
+    calibrate_parser.add_argument("--particles", type=int, default=200)
+    calibrate_parser.add_argument("--generations", type=int, default=10)
+    calibrate_parser.add_argument(
+        "--budget", type=float, default=None, help="Wall-clock seconds"
+    )
+    calibrate_parser.add_argument("--batch-size", type=int, default=256)
+    calibrate_parser.add_argument("--workers", type=int, default=None)
+    calibrate_parser.add_argument(
+        "--out", default=None, help="CSV file for the posterior sample"
+    )
+    calibrate_parser.set_defaults(handler=calibrate)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "checkpoint_every", None) and not args.checkpoint:
+        parser.error("--checkpoint-every needs --checkpoint")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
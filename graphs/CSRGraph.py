@@ -0,0 +1,99 @@
+import hashlib
+import os
+
+import numpy as np
+from scipy import sparse
+
+
+class CSRGraph:
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+        self.num_nodes = len(indptr) - 1
+        # Set when the arrays are memory-mapped from a directory on disk
+        self.directory = None
+        self._digest = None
+
+    @classmethod
+    def from_edges(cls, num_nodes, src, dst):
+        # Undirected: store every edge in both directions
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        loops = src == dst
+        src = src[~loops]
+        dst = dst[~loops]
+
+        # Sorting the packed (row, col) keys orders and dedupes in one pass
+        keys = np.concatenate([src * num_nodes + dst, dst * num_nodes + src])
+        keys.sort()
+        if len(keys):
+            keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        rows, cols = np.divmod(keys, num_nodes)
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+        index_dtype = np.int32 if num_nodes < 2**31 else np.int64
+        return cls(indptr, cols.astype(index_dtype))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = "r" if mmap else None
+        indptr = np.load(os.path.join(directory, "indptr.npy"), mmap_mode=mode)
+        indices = np.load(
+            os.path.join(directory, "indices.npy"), mmap_mode=mode
+        )
+        graph = cls(indptr, indices)
+        if mmap:
+            graph.directory = os.path.abspath(directory)
+        return graph
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "indptr.npy"), self.indptr)
+        np.save(os.path.join(directory, "indices.npy"), self.indices)
+
+    def digest(self):
+        # Content hash of the CSR arrays, read in blocks so mapped graphs
+        # are never loaded whole; computed once per graph
+        if self._digest is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for array in (self.indptr, self.indices):
+                digest.update(str(array.dtype).encode())
+                for start in range(0, len(array), 1 << 24):
+                    block = array[start:start + (1 << 24)]
+                    digest.update(np.ascontiguousarray(block).tobytes())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def num_edges(self):
+        return len(self.indices) // 2
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edges(self):
+        rows = np.repeat(
+            np.arange(self.num_nodes, dtype=self.indices.dtype), self.degree()
+        )
+        upper = rows < self.indices
+        return rows[upper], self.indices[upper]
+
+    def adjacency(self, dtype=np.float64):
+        data = np.ones(len(self.indices), dtype=dtype)
+        return sparse.csr_array(
+            (data, self.indices, self.indptr),
+            shape=(self.num_nodes, self.num_nodes),
+        )
+
+    def to_networkx(self):
+        # Only visualization needs networkx, so import it on demand
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.num_nodes))
+        graph.add_edges_from(zip(*(e.tolist() for e in self.edges())))
+        return graph
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from graphs.CSRGraph import CSRGraph
+
+CHUNK_EDGES = 1 << 22
+ROW_BLOCK_ENTRIES = 1 << 24
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {
+        "source": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+def default_cache_dir(path):
+    return os.path.abspath(path) + ".csr"
+
+
+def read_edge_chunks(path, binary_dtype=None, chunk_edges=None):
+    # Yields (src, dst) int64 arrays without holding the whole list
+    chunk_edges = chunk_edges or CHUNK_EDGES
+    if binary_dtype is not None:
+        pairs = np.memmap(path, dtype=binary_dtype, mode="r").reshape(-1, 2)
+        for start in range(0, len(pairs), chunk_edges):
+            chunk = pairs[start:start + chunk_edges]
+            chunk = np.asarray(chunk, dtype=np.int64)
+            yield chunk[:, 0], chunk[:, 1]
+        return
+
+    reader = pd.read_csv(
+        path,
+        sep=r"\s+",
+        comment="#",
+        header=None,
+        usecols=[0, 1],
+        dtype=np.int64,
+        chunksize=chunk_edges,
+        engine="c",
+    )
+    for frame in reader:
+        chunk = frame.to_numpy()
+        yield chunk[:, 0], chunk[:, 1]
+
+
+def build_csr(path, directory, binary_dtype=None, chunk_edges=None):
+    def chunks():
+        return read_edge_chunks(path, binary_dtype, chunk_edges)
+
+    # Pass 1: the sorted set of original node IDs
+    node_ids = np.empty(0, dtype=np.int64)
+    for src, dst in chunks():
+        node_ids = np.union1d(node_ids, np.concatenate([src, dst]))
+    num_nodes = len(node_ids)
+    index_dtype = np.int32 if num_nodes < 2**31 else np.int64
+
+    # Pass 2: degrees of the symmetrized graph, self-loops dropped
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    for src, dst in chunks():
+        src = np.searchsorted(node_ids, src)
+        dst = np.searchsorted(node_ids, dst)
+        keep = src != dst
+        degree += np.bincount(src[keep], minlength=num_nodes)
+        degree += np.bincount(dst[keep], minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+
+    # Pass 3: scatter every entry into its row, still unsorted
+    scratch = tempfile.mkdtemp(dir=directory)
+    try:
+        raw = np.lib.format.open_memmap(
+            os.path.join(scratch, "raw.npy"), mode="w+",
+            dtype=index_dtype, shape=(max(int(indptr[-1]), 1),),
+        )
+        cursor = indptr[:-1].copy()
+        for src, dst in chunks():
+            src = np.searchsorted(node_ids, src)
+            dst = np.searchsorted(node_ids, dst)
+            keep = src != dst
+            rows = np.concatenate([src[keep], dst[keep]])
+            cols = np.concatenate([dst[keep], src[keep]])
+            order = np.argsort(rows, kind="stable")
+            rows = rows[order]
+            cols = cols[order]
+            first = np.searchsorted(rows, rows, side="left")
+            position = cursor[rows] + np.arange(len(rows)) - first
+            raw[position] = cols
+            np.add.at(cursor, rows, 1)
+
+        # Pass 4: sort and dedupe each row block, compacting as we go
+        out_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        compact_path = os.path.join(scratch, "compact.bin")
+        with open(compact_path, "wb") as compact:
+            row = 0
+            while row < num_nodes:
+                end = int(np.searchsorted(
+                    indptr, indptr[row] + ROW_BLOCK_ENTRIES, side="right"
+                )) - 1
+                end = min(max(end, row + 1), num_nodes)
+                lo, hi = int(indptr[row]), int(indptr[end])
+                rows = np.repeat(
+                    np.arange(row, end, dtype=np.int64), degree[row:end]
+                )
+                keys = rows * num_nodes + raw[lo:hi]
+                keys = np.unique(keys)
+                block_rows, block_cols = np.divmod(keys, num_nodes)
+                out_indptr[row + 1:end + 1] = np.bincount(
+                    block_rows - row, minlength=end - row
+                )
+                block_cols.astype(index_dtype).tofile(compact)
+                row = end
+        np.cumsum(out_indptr, out=out_indptr)
+
+        indices = np.lib.format.open_memmap(
+            os.path.join(directory, "indices.npy"), mode="w+",
+            dtype=index_dtype, shape=(int(out_indptr[-1]),),
+        )
+        packed = np.empty(0, dtype=index_dtype)
+        if out_indptr[-1]:
+            packed = np.memmap(compact_path, dtype=index_dtype, mode="r")
+        for start in range(0, len(indices), ROW_BLOCK_ENTRIES):
+            stop = start + ROW_BLOCK_ENTRIES
+            indices[start:stop] = packed[start:stop]
+        indices.flush()
+        del indices, packed, raw
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    np.save(os.path.join(directory, "indptr.npy"), out_indptr)
+    np.save(os.path.join(directory, "node_ids.npy"), node_ids)
+
+
+def load_edge_list(path, cache_dir=None, binary_dtype=None, chunk_edges=None):
+    # Streams a whitespace-separated (SNAP-style) edge list, or with
+    # binary_dtype set (e.g. "<u4") a raw file of (src, dst) pairs of that
+    # dtype, into an on-disk CSR next to it, chunk_edges edges at a time
+    # (default CHUNK_EDGES), then memory-maps that CSR; later calls with
+    # an unchanged source and format skip straight to the mapping
+    cache_dir = cache_dir or default_cache_dir(path)
+    signature = source_signature(path)
+    if binary_dtype is not None:
+        signature["binary_dtype"] = np.dtype(binary_dtype).str
+    meta_path = os.path.join(cache_dir, "meta.json")
+
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as file:
+            if json.load(file) == signature:
+                return CSRGraph.load(cache_dir, mmap=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    build_csr(path, cache_dir, binary_dtype, chunk_edges)
+    with open(meta_path, "w", encoding="utf-8") as file:
+        json.dump(signature, file)
+    return CSRGraph.load(cache_dir, mmap=True)
+
+
+def load_node_ids(path, cache_dir=None):
+    # Original node ID of every model node, for mapping results back
+    cache_dir = cache_dir or default_cache_dir(path)
+    return np.load(os.path.join(cache_dir, "node_ids.npy"), mmap_mode="r")
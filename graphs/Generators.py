@@ -0,0 +1,135 @@
+import numpy as np
+
+from graphs.CSRGraph import CSRGraph
+
+
+def pair_from_index(k):
+    # Decode a linear index over the strict lower triangle into (i, j), j < i
+    i = ((1 + np.sqrt(1 + 8 * k.astype(np.float64))) // 2).astype(np.int64)
+    i -= (i * (i - 1) // 2) > k
+    i += ((i + 1) * i // 2) <= k
+    j = k - i * (i - 1) // 2
+    return i, j
+
+
+def erdos_renyi(num_nodes, prob, rng):
+    # Sample the edge count, then that many distinct node pairs: O(n + m)
+    num_pairs = num_nodes * (num_nodes - 1) // 2
+    if num_pairs == 0 or prob <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return CSRGraph.from_edges(num_nodes, empty, empty)
+    if prob >= 1:
+        k = np.arange(num_pairs, dtype=np.int64)
+    else:
+        num_edges = rng.binomial(num_pairs, prob)
+        k = rng.choice(num_pairs, size=num_edges, replace=False)
+    src, dst = pair_from_index(np.asarray(k, dtype=np.int64))
+    return CSRGraph.from_edges(num_nodes, src, dst)
+
+
+def barabasi_albert(num_nodes, m, rng):
+    # Batagelj-Brandes: node t >= m adds m edges whose targets are copied
+    # from uniformly chosen endpoints of earlier edges (degree-proportional).
+    # Sources are known up front, copied targets are resolved by pointer
+    # jumping, so the whole graph is O(m log n) array work
+    if not 1 <= m < num_nodes:
+        raise ValueError("barabasi_albert needs 1 <= m < num_nodes")
+    num_edges = m * (num_nodes - m)
+    edge = np.arange(num_edges, dtype=np.int64)
+    src = m + edge // m
+    # The first new node links to all m seed nodes
+    dst = np.full(num_edges, -1, dtype=np.int64)
+    dst[:m] = edge[:m]
+
+    # Endpoint slot 2e is the source of edge e, slot 2e + 1 its target
+    slots = 2 * m * (src[m:] - m)
+    pick = (rng.random(num_edges - m) * slots).astype(np.int64)
+    pointer = edge.copy()
+    from_source = pick % 2 == 0
+    dst[m:][from_source] = src[pick[from_source] // 2]
+    pointer[m:][~from_source] = pick[~from_source] // 2
+
+    pending = np.flatnonzero(dst < 0)
+    while len(pending):
+        target = pointer[pending]
+        done = dst[target] >= 0
+        dst[pending[done]] = dst[target[done]]
+        pending = pending[~done]
+        pointer[pending] = pointer[pointer[pending]]
+    # Repeated targets of one node collapse in from_edges
+    return CSRGraph.from_edges(num_nodes, src, dst)
+
+
+def watts_strogatz(num_nodes, k, prob, rng):
+    # Ring lattice with k // 2 neighbors on each side, then every edge's far
+    # end is rewired to a uniform node with probability prob
+    half = k // 2
+    if not 1 <= half < num_nodes / 2:
+        raise ValueError("watts_strogatz needs 2 <= k < num_nodes")
+    src = np.repeat(np.arange(num_nodes, dtype=np.int64), half)
+    dst = (src + np.tile(np.arange(1, half + 1), num_nodes)) % num_nodes
+    rewire = rng.random(len(src)) < prob
+    dst[rewire] = rng.integers(num_nodes, size=int(rewire.sum()))
+    return CSRGraph.from_edges(num_nodes, src, dst)
+
+
+def configuration_model(
+    num_nodes, rng, exponent=2.5, min_degree=1, max_degree=None
+):
+    # Erased configuration model over a power-law degree sequence: stubs
+    # are shuffled and paired, self-loops and multi-edges dropped
+    if exponent <= 1:
+        raise ValueError("configuration_model needs exponent > 1")
+    max_degree = max_degree or num_nodes - 1
+    u = rng.random(num_nodes)
+    degree = np.floor(min_degree * (1 - u) ** (-1 / (exponent - 1)))
+    degree = np.minimum(degree, max_degree).astype(np.int64)
+    if degree.sum() % 2:
+        degree[rng.integers(num_nodes)] += 1
+    stubs = np.repeat(np.arange(num_nodes, dtype=np.int64), degree)
+    rng.shuffle(stubs)
+    return CSRGraph.from_edges(num_nodes, stubs[0::2], stubs[1::2])
+
+
+def stochastic_block_model(num_nodes, sizes, p_in, p_out, rng):
+    # Nodes are laid out block by block; each block pair gets a binomial
+    # edge count and that many distinct pairs, as in erdos_renyi
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if sizes.sum() != num_nodes:
+        raise ValueError("Block sizes must add up to num_nodes")
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    sources, targets = [], []
+    for a in range(len(sizes)):
+        for b in range(a + 1):
+            if a == b:
+                num_pairs = sizes[a] * (sizes[a] - 1) // 2
+                prob = p_in
+            else:
+                num_pairs = sizes[a] * sizes[b]
+                prob = p_out
+            if num_pairs == 0 or prob <= 0:
+                continue
+            num_edges = rng.binomial(num_pairs, min(prob, 1.0))
+            k = rng.choice(num_pairs, size=num_edges, replace=False)
+            k = np.asarray(k, dtype=np.int64)
+            if a == b:
+                i, j = pair_from_index(k)
+            else:
+                i, j = np.divmod(k, sizes[b])
+            sources.append(offsets[a] + i)
+            targets.append(offsets[b] + j)
+    if not sources:
+        empty = np.empty(0, dtype=np.int64)
+        return CSRGraph.from_edges(num_nodes, empty, empty)
+    return CSRGraph.from_edges(
+        num_nodes, np.concatenate(sources), np.concatenate(targets)
+    )
+
+
+GENERATORS = {
+    "erdos_renyi": erdos_renyi,
+    "barabasi_albert": barabasi_albert,
+    "watts_strogatz": watts_strogatz,
+    "configuration": configuration_model,
+    "stochastic_block": stochastic_block_model,
+}
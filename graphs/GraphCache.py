@@ -0,0 +1,81 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from graphs.CSRGraph import CSRGraph
+from graphs.Generators import GENERATORS
+
+
+class GraphCache:
+    def __init__(self, max_entries=8, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(generator, num_nodes, seed, **params):
+        return (generator, num_nodes, tuple(sorted(params.items())), seed)
+
+    def path(self, key):
+        generator, num_nodes, params, seed = key
+        described = "-".join(f"{k}{v!r}" for k, v in params)
+        # Block-size tuples can outgrow a file name; hash those instead
+        if len(described) > 120:
+            described = hashlib.blake2b(
+                described.encode(), digest_size=16
+            ).hexdigest()
+        name = "-".join(
+            [generator, f"n{num_nodes}"]
+            + ([described] if described else [])
+            + [f"s{seed}"]
+        )
+        return os.path.join(self.directory, name)
+
+    def get(self, generator, num_nodes, seed, **params):
+        key = self.key(generator, num_nodes, seed, **params)
+        graph = self.entries.get(key)
+        if graph is not None:
+            self.entries.move_to_end(key)
+            return graph
+
+        graph = self.load(key)
+        if graph is None:
+            rng = np.random.default_rng(seed)
+            graph = GENERATORS[generator](num_nodes, rng=rng, **params)
+            self.store(key, graph)
+
+        self.entries[key] = graph
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return graph
+
+    def load(self, key):
+        if self.directory is None:
+            return None
+        path = self.path(key)
+        if not os.path.isdir(path):
+            return None
+        return CSRGraph.load(path, mmap=True)
+
+    def store(self, key, graph):
+        if self.directory is None:
+            return
+        path = self.path(key)
+        if os.path.isdir(path):
+            return
+        # Write to a scratch directory first so concurrent runs never see
+        # a half-written entry
+        os.makedirs(self.directory, exist_ok=True)
+        scratch = tempfile.mkdtemp(dir=self.directory)
+        graph.save(scratch)
+        try:
+            os.rename(scratch, path)
+        except OSError:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def clear(self):
+        self.entries.clear()
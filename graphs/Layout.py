@@ -0,0 +1,47 @@
+import weakref
+
+import numpy as np
+
+# Small graphs get networkx's spring layout, as the dashboard always drew
+SPRING_LIMIT = 2000
+
+# Positions are computed once per topology object; the shared GraphCache
+# hands the same object to every model built on it
+LAYOUTS = weakref.WeakKeyDictionary()
+
+
+def spring_layout(topology, seed=0):
+    import networkx as nx
+
+    positions = nx.spring_layout(topology.to_networkx(), seed=seed)
+    return np.array([positions[node] for node in range(topology.num_nodes)])
+
+
+def smoothed_layout(topology, seed=0, iterations=30, anchor=0.15):
+    # Random positions pulled toward their neighbors' mean, anchored to the
+    # start so the picture never collapses: O(m) per iteration
+    rng = np.random.default_rng(seed)
+    start = rng.random((topology.num_nodes, 2))
+    adjacency = topology.adjacency()
+    degree = topology.degree()[:, None]
+    isolated = degree[:, 0] == 0
+    positions = start
+    for _ in range(iterations):
+        mean = adjacency @ positions / np.maximum(degree, 1)
+        mean[isolated] = positions[isolated]
+        positions = anchor * start + (1 - anchor) * mean
+    # Averaging crowds the giant component into the middle; spreading each
+    # axis to even ranks keeps neighbors close but fills the plane
+    ranks = np.argsort(np.argsort(positions, axis=0), axis=0)
+    return ranks / max(topology.num_nodes - 1, 1)
+
+
+def layout(topology, seed=0):
+    positions = LAYOUTS.get(topology)
+    if positions is None:
+        if topology.num_nodes <= SPRING_LIMIT:
+            positions = spring_layout(topology, seed)
+        else:
+            positions = smoothed_layout(topology, seed)
+        LAYOUTS[topology] = positions
+    return positions
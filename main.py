@@ -3,7 +3,6 @@ import solara
 
 from models.DisinformationModel import (
     DisinformationModel,
-    State,
     number_infected,
 )
 
@@ -11,22 +10,9 @@ from mesa.visualization import (
     Slider,
     SolaraViz,
     make_plot_component,
-    make_space_component,
 )
 
-def agent_portrayal(agent):
-    node_color_dict = {
-        State.SUSCEPTIBLE: "tab:green",
-        State.EXPOSED: "tab:blue",
-        State.INFECTED: "tab:red",
-        State.DOUBTFUL: "tab:orange",
-        State.RECOVERED: "tab:gray",
-    }
-    return {
-        "color": node_color_dict.get(agent.state, "black"),
-        "size": 10,
-        "tooltip": f"Agent {agent.unique_id}<br>State: {agent.state.name}",
-    }
+from visualization.NetworkView import make_network_component
 
 """
 def get_model_summary(model):
@@ -74,7 +60,7 @@ model_params = {
         label="Number of Agents",
         value=100,
         min=10,
-        max=1000,
+        max=50000,
         step=10,
     ),
     "avg_node_degree": Slider(
@@ -140,10 +126,24 @@ model_params = {
         max=1,
         step=1
     ),
+    "engine": {
+        "type": "Select",
+        "value": "auto",
+        "values": ["auto", "agents", "numpy"],
+        "label": "Step Engine",
+    },
+    "update": {
+        "type": "Select",
+        "value": "async",
+        "values": ["async", "sync"],
+        "label": "Update Mode (agents engine)",
+    },
 }
 
 # Visualization components
-SpacePlot = make_space_component(agent_portrayal)
+# Layout is cached per topology and only node colors change between steps;
+# past 5000 agents a fixed sample of nodes is drawn
+SpacePlot = make_network_component(max_nodes=5000, mode="sample")
 StatePlot = make_plot_component(
     {
         "Susceptible": "tab:green",
@@ -155,7 +155,25 @@ StatePlot = make_plot_component(
     post_process=lambda ax: (ax.set_ylim(ymin=0), ax.set_ylabel("# Agents")),
 )
 
-model =  DisinformationModel()
+# Above this many agents "auto" steps with the numpy engine: UserAgent
+# objects take seconds per step at the slider's upper end
+AGENT_ENGINE_LIMIT = 5000
+
+
+class DashboardModel(DisinformationModel):
+    # The update mode select only applies to the agents engine; the array
+    # engines always step synchronously
+    def __init__(self, engine="auto", update="async", num_agents=100, **kwargs):
+        if engine == "auto":
+            engine = "agents" if num_agents <= AGENT_ENGINE_LIMIT else "numpy"
+        if engine != "agents":
+            update = "sync"
+        super().__init__(
+            engine=engine, update=update, num_agents=num_agents, **kwargs
+        )
+
+
+model = DashboardModel()
 # SolaraViz app
 page = SolaraViz(
    model,
@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from enums.State import State
+from graphs.CSRGraph import CSRGraph
+from models.CounterRNG import CounterRNG
+
+META_FILE = "checkpoint.json"
+TOPOLOGY_DIR = "topology"
+POPULATION = ("state", "age", "education", "sex")
+
+
+def capture(model):
+    # Everything a continuation needs beyond the constructor arguments and
+    # the arrays; small enough to live in JSON
+    convergence = None
+    if model.convergence is not None:
+        convergence = {
+            "counts": [list(c) for c in model.convergence.counts],
+            "hashes": [h.hex() for h in model.convergence.hashes],
+            "period": model.convergence.period,
+        }
+    return {
+        "params": model.init_params,
+        "topology": model.topology_spec,
+        "steps": model.steps,
+        "running": model.running,
+        "converged_step": model.converged_step,
+        "rng": model.rng.bit_generator.state,
+        "random": model.random.getstate(),
+        # Without a seed argument the counter noise key came from entropy
+        "noise_seed": (
+            model.counter_rng.seed if model.counter_rng is not None else None
+        ),
+        "convergence": convergence,
+    }
+
+
+def schedule_order(model):
+    # Per-state membership order decides the async shuffle, so keep it
+    return np.fromiter(
+        (
+            agent.unique_id
+            for state in State
+            for agent in model.agents_by_state[state]
+        ),
+        dtype=np.int64,
+    )
+
+
+def collected_rows(model):
+    collector = model.datacollector
+    if hasattr(collector, "get_agent_states"):
+        counts = collector.get_model_vars_dataframe().to_numpy()
+        states = None
+        if collector.states is not None:
+            states = collector.get_agent_states()
+        return counts, states
+    columns = list(collector.model_vars)
+    counts = np.array(
+        [collector.model_vars[column] for column in columns], dtype=np.int64
+    ).T.reshape(-1, len(columns))
+    return counts, None
+
+
+def save_checkpoint(model, directory):
+    # One directory of .npy arrays plus a JSON header; written to a scratch
+    # directory first so a crash never leaves a half-written checkpoint
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    scratch = tempfile.mkdtemp(dir=parent)
+    try:
+        for name, array in zip(
+            POPULATION,
+            (model.state_codes, model.age_codes, model.education_codes,
+             model.sex_codes),
+        ):
+            np.save(os.path.join(scratch, f"{name}.npy"), array)
+        if model.agent_list is not None:
+            np.save(
+                os.path.join(scratch, "schedule.npy"), schedule_order(model)
+            )
+        counts, states = collected_rows(model)
+        np.save(os.path.join(scratch, "counts.npy"), counts)
+        if states is not None:
+            np.save(os.path.join(scratch, "agent_states.npy"), states)
+        meta = capture(model)
+        if model.topology_spec is None:
+            # Graphs that no generator can rebuild are referenced where
+            # they are mapped from (e.g. an edge-list CSR cache), and only
+            # copied into the checkpoint when they live in memory or inside
+            # the directory being replaced
+            source = topology_source(model.topology, directory)
+            if source is None:
+                model.topology.save(os.path.join(scratch, TOPOLOGY_DIR))
+            meta["topology_source"] = source
+
+        with open(
+            os.path.join(scratch, META_FILE), "w", encoding="utf-8"
+        ) as file:
+            json.dump(meta, file)
+
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.rename(scratch, directory)
+    except BaseException:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+
+
+def topology_source(topology, directory):
+    source = topology.directory
+    if source is None or not os.path.isdir(source):
+        return None
+    target = os.path.abspath(directory)
+    if os.path.commonpath([source, target]) == target:
+        return None
+    return {"directory": source, "digest": topology.digest()}
+
+
+def load_topology(directory, meta):
+    source = meta.get("topology_source")
+    if source is None:
+        # A copy owned by this checkpoint: later checkpoints copy it again
+        # rather than point into a directory that may be replaced
+        topology = CSRGraph.load(os.path.join(directory, TOPOLOGY_DIR))
+        topology.directory = None
+        return topology
+    if os.path.isdir(source["directory"]):
+        topology = CSRGraph.load(source["directory"])
+        if topology.digest() == source["digest"]:
+            return topology
+    raise ValueError(
+        f"The checkpoint's graph at {source['directory']} is missing or "
+        "has changed since the checkpoint was written."
+    )
+
+
+def load_checkpoint(directory):
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as file:
+        meta = json.load(file)
+
+    def array(name, mode="r"):
+        path = os.path.join(directory, f"{name}.npy")
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode=mode)
+
+    # Demographics are never written, so they stay memory-mapped; the
+    # state vector is copied because stepping updates it in place
+    population = (np.array(array("state")),) + tuple(
+        array(name) for name in POPULATION[1:]
+    )
+    topology = None
+    if meta["topology"] is None:
+        topology = load_topology(directory, meta)
+    arrays = {
+        "schedule": array("schedule"),
+        "counts": array("counts"),
+        "agent_states": array("agent_states"),
+    }
+    return meta, population, topology, arrays
+
+
+def topology_from_spec(graph_cache, spec):
+    # JSON turns tuples (e.g. block sizes) into lists; the cache key needs
+    # them hashable again
+    params = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in spec["params"].items()
+    }
+    return graph_cache.get(
+        spec["generator"], spec["num_nodes"], spec["seed"], **params
+    )
+
+
+def resume(cls, meta, population, topology, arrays, **overrides):
+    if topology is None:
+        topology = topology_from_spec(cls.graph_cache, meta["topology"])
+    params = {**meta["params"], **overrides}
+    model = cls(**params, topology=topology, population=population)
+    # The rebuilt model came from a cache hit or the checkpoint itself, but
+    # it should still name the generator so later checkpoints can too
+    model.topology_spec = meta["topology"]
+
+    schedule = arrays["schedule"]
+    if model.agent_list is not None and schedule is not None:
+        for members in model.agents_by_state.values():
+            members.clear()
+        for node in schedule.tolist():
+            agent = model.agent_list[node]
+            model.agents_by_state[agent.state][agent] = None
+
+    restore_collected(model, arrays["counts"], arrays["agent_states"])
+
+    if model.convergence is not None and meta["convergence"] is not None:
+        model.convergence.counts.clear()
+        model.convergence.counts.extend(
+            tuple(c) for c in meta["convergence"]["counts"]
+        )
+        model.convergence.hashes.clear()
+        model.convergence.hashes.extend(
+            bytes.fromhex(h) for h in meta["convergence"]["hashes"]
+        )
+        model.convergence.period = meta["convergence"]["period"]
+
+    model.steps = meta["steps"]
+    model.running = meta["running"]
+    model.converged_step = meta["converged_step"]
+    model.rng.bit_generator.state = meta["rng"]
+    version, internal, gauss = meta["random"]
+    model.random.setstate((version, tuple(internal), gauss))
+    if model.counter_rng is not None and meta.get("noise_seed") is not None:
+        model.counter_rng = CounterRNG(meta["noise_seed"])
+    return model
+
+
+def restore_collected(model, counts, states):
+    # Replace the row the constructor collected with the saved history
+    collector = model.datacollector
+    if hasattr(collector, "append_rows"):
+        collector.reset()
+        collector.append_rows(
+            counts, states if collector.states is not None else None
+        )
+        return
+    for index, column in enumerate(collector.model_vars):
+        collector.model_vars[column] = counts[:, index].tolist()
@@ -0,0 +1,36 @@
+import hashlib
+from collections import deque
+
+
+class ConvergenceDetector:
+    def __init__(self, window=10, max_period=2):
+        if window < 2:
+            raise ValueError("Convergence window must be at least 2 steps.")
+        self.window = window
+        self.max_period = max_period
+        self.counts = deque(maxlen=window + max_period)
+        self.hashes = deque(maxlen=window + max_period)
+        self.period = None
+
+    def update(self, state_counts, state_codes):
+        self.counts.append(tuple(state_counts.values()))
+        self.hashes.append(
+            hashlib.blake2b(state_codes.tobytes(), digest_size=16).digest()
+        )
+        return self.converged()
+
+    def converged(self):
+        # Period 1 is a frozen state vector; longer periods are short cycles
+        for period in range(1, self.max_period + 1):
+            if len(self.hashes) < self.window + period:
+                break
+            counts = list(self.counts)
+            hashes = list(self.hashes)
+            if all(
+                counts[-i] == counts[-i - period]
+                and hashes[-i] == hashes[-i - period]
+                for i in range(1, self.window + 1)
+            ):
+                self.period = period
+                return True
+        return False
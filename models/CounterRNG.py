@@ -0,0 +1,86 @@
+import numpy as np
+
+# Philox4x32-10 (Salmon et al., "Parallel random numbers: as easy as
+# 1, 2, 3"), vectorized over numpy arrays of counters
+MULTIPLIERS = (0xD2511F53, 0xCD9E8D57)
+WEYL = (0x9E3779B9, 0xBB67AE85)
+MASK = np.uint64(0xFFFFFFFF)
+ROUNDS = 10
+
+
+def philox4x32(counter, key):
+    # counter: four equally shaped uint32-valued arrays; key: two ints.
+    # Returns four uint64 arrays of 32-bit words, a pure function of
+    # counter and key. Updated in place to keep 1M-agent steps cheap
+    c0, c1, c2, c3 = (np.array(word, dtype=np.uint64) for word in counter)
+    k0, k1 = int(key[0]), int(key[1])
+    m0, m1 = np.uint64(MULTIPLIERS[0]), np.uint64(MULTIPLIERS[1])
+    shift = np.uint64(32)
+    product0, product1 = np.empty_like(c0), np.empty_like(c0)
+    for index in range(ROUNDS):
+        if index:
+            k0 = (k0 + WEYL[0]) & 0xFFFFFFFF
+            k1 = (k1 + WEYL[1]) & 0xFFFFFFFF
+        np.multiply(c0, m0, out=product0)
+        np.multiply(c2, m1, out=product1)
+        # c0, c1, c2, c3 = hi1 ^ c1 ^ k0, lo1, hi0 ^ c3 ^ k1, lo0
+        np.right_shift(product1, shift, out=c0)
+        c0 ^= c1
+        c0 ^= np.uint64(k0)
+        np.bitwise_and(product1, MASK, out=c1)
+        np.right_shift(product0, shift, out=c2)
+        c2 ^= c3
+        c2 ^= np.uint64(k1)
+        np.bitwise_and(product0, MASK, out=c3)
+    return c0, c1, c2, c3
+
+
+class CounterRNG:
+    # Uniform draws addressed by (step, agent, draw index) instead of by
+    # position in a stream: the same seed gives the same numbers whatever
+    # order, partition or worker asks for them, and any single draw can be
+    # regenerated on its own. Each Philox block holds four draws of one
+    # agent at one step; the last counter word is free for a stream id
+    def __init__(self, seed, stream=0):
+        # seed: None, an int, a sequence of ints or a SeedSequence. self.seed
+        # always rebuilds the same key: without a seed it is the entropy
+        # the key was derived from
+        if seed is None:
+            sequence = np.random.SeedSequence()
+            seed = sequence.entropy
+        elif isinstance(seed, np.random.SeedSequence):
+            sequence = seed
+        elif isinstance(seed, (int, np.integer)):
+            # SeedSequence takes non-negative entropy of any size
+            seed = int(seed)
+            if seed < 0:
+                seed %= 2**64
+            sequence = np.random.SeedSequence(seed)
+        else:
+            sequence = np.random.SeedSequence(seed)
+        words = sequence.generate_state(2)
+        self.key = tuple(int(word) for word in words)
+        self.seed = seed
+        self.stream = stream
+
+    def random(self, step, agents, shape=()):
+        # (len(agents),) + shape doubles in [0, 1) with 32-bit resolution
+        agents = np.asarray(agents, dtype=np.uint64) & MASK
+        draws = int(np.prod(shape, dtype=np.int64))
+        blocks = -(-draws // 4)
+        agent = np.repeat(agents, blocks)
+        block = np.tile(np.arange(blocks, dtype=np.uint64), len(agents))
+        words = philox4x32(
+            (
+                agent,
+                np.full_like(agent, int(step) & 0xFFFFFFFF),
+                block,
+                np.full_like(agent, self.stream),
+            ),
+            self.key,
+        )
+        values = np.empty((len(agent), 4), dtype=np.float64)
+        for column, word in enumerate(words):
+            np.multiply(word, 2.0**-32, out=values[:, column])
+        values = values.reshape(len(agents), -1)[:, :draws]
+        return values.reshape((len(agents),) + tuple(shape))
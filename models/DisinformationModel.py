@@ -1,18 +1,51 @@
 import math
-import networkx as nx
+from operator import attrgetter
+import numpy as np
 from mesa import Model
-from mesa.experimental.cell_space.cell_collection import CellCollection
 from mesa.experimental.cell_space.network import Network
 from mesa.datacollection import DataCollector
 
+from agents.AgentStore import AgentStore, AgentView, STATES
 from agents.UserAgent import UserAgent, State
+from collectors.StreamingCollector import StreamingCollector
+from engines.NumpyEngine import NumpyEngine
+from engines.ParallelEngine import ParallelEngine
+from models.Checkpoint import (
+    capture,
+    collected_rows,
+    load_checkpoint,
+    resume,
+    save_checkpoint,
+    schedule_order,
+)
+from models.ConvergenceDetector import ConvergenceDetector
+from models.CounterRNG import CounterRNG
+from models.StepProfiler import StepProfiler
+from enums.distributions.ScoreTables import ScoreTables
+from enums.transitions.RuleTable import RuleTable
+from enums.transitions.TransitionRules import TransitionRules
+from graphs.CSRGraph import CSRGraph
+from graphs.GraphCache import GraphCache
 from enums.groups.AgeGroup import AgeGroup
 from enums.groups.EducationGroup import EducationGroup
 
 
 # State counters
+def scan_state(model, state):
+    if model.agent_list is None:
+        return int((model.state_codes == state.value).sum())
+    return sum(1 for a in model.agents if a.state is state)
+
 def number_state(model, state):
-    return sum(1 for a in model.grid.all_cells.agents if a.state is state)
+    count = model.state_counts[state]
+    if model.debug:
+        scanned = scan_state(model, state)
+        if count != scanned:
+            raise RuntimeError(
+                f"{state.name} counter is {count} but a full scan "
+                f"found {scanned} agents."
+            )
+    return count
 
 def number_infected(model):
     return number_state(model, State.INFECTED)
@@ -29,12 +62,101 @@ def number_doubtful(model):
 def number_recovered(model):
     return number_state(model, State.RECOVERED)
 
+model_reporters = {
+    "Infected": number_infected,
+    "Susceptible": number_susceptible,
+    "Recovered": number_recovered,
+    "Exposed": number_exposed,
+    "Doubtful": number_doubtful,
+}
+
+
+def sample_population(
+    rng,
+    num_agents,
+    initial_outbreak_size,
+    initial_exposed_size,
+    initial_doubtful_size,
+    initial_recovered_size,
+):
+    # Demographics are sampled for the whole population at once
+    age_codes = rng.integers(len(AgeGroup), size=num_agents, dtype=np.int8)
+    education_codes = rng.integers(
+        len(EducationGroup), size=num_agents, dtype=np.int8
+    )
+    # 0 = female, 1 = male
+    sex_codes = rng.integers(2, size=num_agents, dtype=np.int8)
+
+    # One permutation hands out the initial I/E/D/R seeds in consecutive,
+    # disjoint slices; everyone else starts susceptible
+    state_codes = np.full(num_agents, State.SUSCEPTIBLE.value, dtype=np.int8)
+    order = rng.permutation(num_agents)
+    start = 0
+    for count, state in [
+        (initial_outbreak_size, State.INFECTED),
+        (initial_exposed_size, State.EXPOSED),
+        (initial_doubtful_size, State.DOUBTFUL),
+        (initial_recovered_size, State.RECOVERED),
+    ]:
+        state_codes[order[start:start + count]] = state.value
+        start += count
+
+    return state_codes, age_codes, education_codes, sex_codes
+
+
+def block_codes(group_by, age_codes, education_codes):
+    # Stochastic-block-model membership from the sampled demographics
+    if group_by == "age":
+        return age_codes.astype(np.int64), len(AgeGroup)
+    if group_by == "education":
+        return education_codes.astype(np.int64), len(EducationGroup)
+    if group_by == "age_education":
+        blocks = (
+            age_codes.astype(np.int64) * len(EducationGroup) + education_codes
+        )
+        return blocks, len(AgeGroup) * len(EducationGroup)
+    raise ValueError(f"Unknown block grouping: {group_by}")
+
+
+def generator_params(topology, num_agents, avg_node_degree, **params):
+    # Derives each generator's parameters from avg_node_degree; anything
+    # in params overrides the derived values
+    if topology == "erdos_renyi":
+        derived = {"prob": avg_node_degree / num_agents}
+    elif topology == "barabasi_albert":
+        derived = {"m": max(1, round(avg_node_degree / 2))}
+    elif topology == "watts_strogatz":
+        derived = {"k": max(2, 2 * round(avg_node_degree / 2)), "prob": 0.1}
+    elif topology == "configuration":
+        exponent = params.get("exponent", 2.5)
+        # Mean of a continuous power law is min_degree (g - 1) / (g - 2)
+        scale = (exponent - 2) / (exponent - 1) if exponent > 2 else 0.5
+        derived = {
+            "exponent": exponent,
+            "min_degree": max(1, round(avg_node_degree * scale)),
+        }
+    else:
+        raise ValueError(f"Unknown topology: {topology}")
+    return {**derived, **params}
+
+
+def block_params(sizes, avg_node_degree, homophily=10.0):
+    # p_in = homophily * p_out, scaled so the expected degree matches
+    sizes = np.asarray(sizes, dtype=np.float64)
+    total = sizes.sum()
+    within = (sizes * (sizes - 1) / 2).sum()
+    between = total * (total - 1) / 2 - within
+    p_out = total * avg_node_degree / 2 / (homophily * within + between)
+    return {"p_in": min(1.0, homophily * p_out), "p_out": min(1.0, p_out)}
+
 
 class DisinformationModel(Model):
     MODERATION_INFLUENCE = 2.0
-    graph = None
-    prob = 0.0
-    seed = 0
+    # Shared across instances so sweeps and SolaraViz resets reuse
+    # topologies; point graph_cache.directory somewhere to persist them
+    graph_cache = GraphCache()
+    # Subclasses may swap in their own rule list; it is compiled per model
+    transition_rules = TransitionRules
 
     def __init__(
         self,
@@ -55,18 +177,103 @@ class DisinformationModel(Model):
         threshold_IR=1.3,
         threshold_DE=1.4,
         seed=None,
+        noise="stream",
 
-        moderation=0
+        moderation=0,
+        topology=None,
+        topology_params=None,
+        engine="agents",
+        update=None,
+        workers=None,
+        compact=False,
+        debug=False,
+
+        output_dir=None,
+        agent_states=False,
+        chunk_size=256,
+
+        convergence_window=None,
+        max_cycle_period=2,
+        profile=False,
+        population=None
     ):
+        # Constructor arguments, kept so checkpoints and forks can rebuild
+        # the model; topology and population are stored separately
+        self.init_params = {
+            key: value
+            for key, value in locals().items()
+            if key not in ("self", "__class__", "topology", "population")
+        }
         super().__init__(seed=seed)
+        # mesa leaves self.rng unseeded when only seed= is given; derive it
+        # from the seeded stdlib RNG so graphs and array draws reproduce
+        self.rng = np.random.default_rng(self.random.getrandbits(128))
 
+        # "stream" draws the demographic noise from self.rng in sequence;
+        # "counter" derives each agent's draws from (seed, step, agent id,
+        # draw index), so they do not depend on order, partitioning or
+        # worker count
+        if noise not in ("stream", "counter"):
+            raise ValueError(f"Unknown noise mode: {noise}")
+        self.noise = noise
+        self.counter_rng = None
+        if noise == "counter":
+            self.counter_rng = CounterRNG(self._seed)
+
+        if engine not in ("agents", "numpy", "parallel"):
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
+        # "async" lets agents see neighbors already updated this tick (the
+        # shuffle_do order); "sync" decides from the previous tick for all.
+        # The array engines are always sync; None picks the engine's mode
+        if update is None:
+            update = "async" if engine == "agents" else "sync"
+        if update not in ("async", "sync"):
+            raise ValueError(f"Unknown update mode: {update}")
+        if update == "async" and engine != "agents":
+            raise ValueError(
+                f"The {engine} engine only steps synchronously; use "
+                "update='sync' or the agents engine."
+            )
+        self.update = update
+        # compact=True keeps the population only as int8 arrays in
+        # self.store; it needs an array-based engine to step
+        if compact and engine == "agents":
+            raise ValueError(
+                "The agents engine needs UserAgent objects; use the numpy "
+                "or parallel engine with compact=True."
+            )
+
+        # The topology is kept as CSR arrays; the mesa Network behind
+        # self.grid is only built when visualization asks for it. A
+        # prebuilt CSRGraph (e.g. a loaded edge list) sets the population,
+        # otherwise topology names a generator in graphs.Generators
+        self.graph_seed = int(self.rng.integers(2**63))
+        self.topology_spec = None
+        if isinstance(topology, CSRGraph):
+            num_agents = topology.num_nodes
+        else:
+            topology = topology or "erdos_renyi"
+        self._grid = None
+
+        self.debug = debug
+        # Insertion-ordered per-state membership, so scheduling stays
+        # reproducible for a given seed
+        self.agents_by_state = {state: {} for state in State}
         self.num_agents = num_agents
         self.age_weight = age_weight
         self.education_weight = education_weight
         self.sex_weight = sex_weight
+        self.score_tables = ScoreTables(
+            age_weight, education_weight, sex_weight
+        )
+        self.rules = RuleTable(self.transition_rules)
+        self.demographic_scores = None
 
         if moderation:
-            self.threshold_SE = float(threshold_SE) * DisinformationModel.MODERATION_INFLUENCE
+            self.threshold_SE = (
+                float(threshold_SE) * DisinformationModel.MODERATION_INFLUENCE
+            )
         else:
             self.threshold_SE = float(threshold_SE)
         self.threshold_EI = float(threshold_EI)
@@ -80,68 +287,285 @@ class DisinformationModel(Model):
             initial_doubtful_size + initial_recovered_size
         )
         if total_initial > num_agents:
-            raise ValueError("Initial state counts exceed total number of agents.")
-
-        prob = avg_node_degree / num_agents
-        if DisinformationModel.graph is None or num_agents != DisinformationModel.graph.number_of_nodes() or DisinformationModel.prob != prob or DisinformationModel.seed != seed:
-            DisinformationModel.seed = seed
-            DisinformationModel.prob = prob
-            DisinformationModel.graph = nx.erdos_renyi_graph(n=num_agents, p=prob)
-        self.grid = Network(DisinformationModel.graph, capacity=1, random=self.random)
-
-        self.datacollector = DataCollector(
-            {
-                "Infected": number_infected,
-                "Susceptible": number_susceptible,
-                "Recovered": number_recovered,
-                "Exposed": number_exposed,
-                "Doubtful": number_doubtful,
-            }
-        )
-
-
-        all_cells = list(self.grid.all_cells)
-        for node, cell in zip(DisinformationModel.graph.nodes, all_cells):
-            age_group = self.random.choice(list(AgeGroup))
-            education_group = self.random.choice(list(EducationGroup))
-            sex_group = self.random.choice([0, 1])  # 0 = female, 1 = male
-
-            agent = UserAgent(
-                model=self,
-                unique_id=node,
-                initial_state=State.SUSCEPTIBLE,
-                age_group=age_group,
-                education_group=education_group,
-                sex_group=sex_group,
-                cell=cell,
+            raise ValueError(
+                "Initial state counts exceed total number of agents."
             )
-            cell.agents.append(agent)
 
-        state_assignments = [
-            (initial_outbreak_size, State.INFECTED),
-            (initial_exposed_size, State.EXPOSED),
-            (initial_doubtful_size, State.DOUBTFUL),
-            (initial_recovered_size, State.RECOVERED),
-        ]
+        # With output_dir set, collected rows stream to disk in chunks
+        # instead of accumulating in memory
+        if output_dir is None:
+            self.datacollector = DataCollector(model_reporters)
+        else:
+            self.datacollector = StreamingCollector(
+                output_dir,
+                model_reporters,
+                num_agents,
+                agent_states=agent_states,
+                chunk_size=chunk_size,
+            )
 
-        remaining_cells = CellCollection(all_cells, random=self.random)
 
-        for count, state in state_assignments:
-            if count > 0:
-                selected = CellCollection(
-                    self.random.sample(list(remaining_cells), count),
-                    random=self.random
+        # A given population (state, age, education, sex codes) comes from a
+        # checkpoint or fork and is already laid out for its topology
+        if population is None:
+            population = sample_population(
+                self.rng,
+                num_agents,
+                initial_outbreak_size,
+                initial_exposed_size,
+                initial_doubtful_size,
+                initial_recovered_size,
+            )
+        if isinstance(topology, CSRGraph):
+            self.topology = topology
+        else:
+            if topology == "stochastic_block":
+                # Reorder agents block by block so the generator can lay
+                # blocks out as contiguous node ranges
+                params = dict(topology_params or {})
+                blocks, num_blocks = block_codes(
+                    params.pop("group_by", "age_education"),
+                    population[1],
+                    population[2],
                 )
-                for a in selected.agents:
-                    a.state = state
-                remaining_cells = CellCollection(
-                    [c for c in remaining_cells if c not in selected],
-                    random=self.random
+                order = np.argsort(blocks, kind="stable")
+                population = tuple(codes[order] for codes in population)
+                sizes = tuple(
+                    int(size)
+                    for size in np.bincount(blocks, minlength=num_blocks)
                 )
+                params = {
+                    **block_params(
+                        sizes, avg_node_degree, params.pop("homophily", 10.0)
+                    ),
+                    **params,
+                }
+                params["sizes"] = sizes
+            else:
+                params = generator_params(
+                    topology,
+                    num_agents,
+                    avg_node_degree,
+                    **(topology_params or {}),
+                )
+            self.topology_spec = {
+                "generator": topology,
+                "num_nodes": num_agents,
+                "seed": self.graph_seed,
+                "params": params,
+            }
+            self.topology = DisinformationModel.graph_cache.get(
+                topology, num_agents, self.graph_seed, **params
+            )
+        self.store = AgentStore(*population)
+        self.state_codes = self.store.state
+        self.age_codes = self.store.age
+        self.education_codes = self.store.education
+        self.sex_codes = self.store.sex
+        self.state_counts = self.store.counts
+
+        self.agent_list = None
+        if not compact:
+            self.agent_list = [
+                UserAgent(
+                    model=self,
+                    unique_id=node,
+                    initial_state=view.state,
+                    age_group=view.age_group,
+                    education_group=view.education_group,
+                    sex_group=view.sex_group,
+                )
+                for node, view in enumerate(self.store.views())
+            ]
+
+        self.step_engine = None
+        if engine == "numpy":
+            self.step_engine = NumpyEngine(self, self.topology)
+        elif engine == "parallel":
+            self.step_engine = ParallelEngine(
+                self, self.topology, workers=workers
+            )
+
+        # Opt-in: stop once counts and the state vector freeze or cycle
+        self.convergence = None
+        if convergence_window:
+            self.convergence = ConvergenceDetector(
+                convergence_window, max_cycle_period
+            )
+        self.converged_step = None
+
+        # Opt-in per-step phase timings and rule counts; off, it costs one
+        # attribute check per phase
+        self.profiler = StepProfiler() if profile else None
 
         self.running = True
         self.datacollector.collect(self)
+        self.check_convergence()
+
+    @property
+    def grid(self):
+        if self._grid is None:
+            self._grid = Network(
+                self.topology.to_networkx(), capacity=1, random=self.random
+            )
+            if self.agent_list is None:
+                # Proxies are only created here, for drawing and inspection
+                for node, cell in enumerate(self._grid.all_cells):
+                    cell.add_agent(AgentView(self.store, node, cell))
+            else:
+                for agent, cell in zip(self.agent_list, self._grid.all_cells):
+                    agent.cell = cell
+        return self._grid
+
+    def commit_states(self, new):
+        if self.agent_list is None:
+            self.store.commit(new)
+            return
+        # Write back through the agents so counters and membership follow
+        for i in np.flatnonzero(new != self.state_codes).tolist():
+            self.agent_list[i].state = STATES[new[i]]
+
+    def active_ids(self):
+        # Agents in a state with an outgoing rule, in ascending id order
+        codes = [state.value for state in self.rules.active_states]
+        return np.flatnonzero(np.isin(self.state_codes, codes))
+
+    def draw_demographic_scores(self, agents):
+        # (len(agents), slots) scores for the given ids only, so agents
+        # that cannot transition cost nothing. One evaluation slot per rule
+        # of the busiest source state, since E agents score both E -> I and
+        # E -> D in the same step. Stream noise follows the order of
+        # agents, which every engine passes in ascending id order
+        if self.counter_rng is None:
+            noise = self.score_tables.draw_noise(
+                self.rng, (len(agents), self.rules.num_slots)
+            )
+        else:
+            noise = self.score_tables.draw_keyed_noise(
+                self.counter_rng, self.steps, agents, self.rules.num_slots
+            )
+        return self.score_tables.demographic_scores(
+            self.state_codes[agents, None],
+            self.age_codes[agents, None],
+            self.education_codes[agents, None],
+            self.sex_codes[agents, None],
+            noise,
+        )
 
     def step(self):
-        self.agents.shuffle_do("step")
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin(self)
+        if self.step_engine is None:
+            # Row i of the scores belongs to agents[i]
+            agents = self.active_agents()
+            agents.sort(key=attrgetter("unique_id"))
+            ids = np.fromiter(
+                (agent.unique_id for agent in agents),
+                dtype=np.int64,
+                count=len(agents),
+            )
+            self.demographic_scores = self.draw_demographic_scores(ids)
+            if profiler is not None:
+                profiler.lap("scores")
+            if self.update == "sync":
+                self.synchronous_step(agents)
+            else:
+                self.asynchronous_step(agents)
+            if profiler is not None:
+                profiler.lap("evaluate")
+        else:
+            self.step_engine.step(profiler)
         self.datacollector.collect(self)
+        if profiler is not None:
+            profiler.lap("collect")
+        self.check_convergence()
+        if profiler is not None:
+            profiler.lap("convergence")
+            profiler.end(self)
+
+    def active_agents(self):
+        # Only agents in a state with an outgoing rule need visiting
+        return [
+            agent
+            for state in self.rules.active_states
+            for agent in self.agents_by_state[state]
+        ]
+
+    def asynchronous_step(self, agents):
+        order = list(range(len(agents)))
+        self.random.shuffle(order)
+        scores = self.demographic_scores
+        for i in order:
+            agents[i].step(scores[i])
+
+    def synchronous_step(self, agents):
+        # Double buffering: every decision reads the previous tick's
+        # states, then all changes are committed together
+        next_states = [
+            agent.next_state(scores)
+            for agent, scores in zip(agents, self.demographic_scores)
+        ]
+        for agent, state in zip(agents, next_states):
+            if state is not agent.state:
+                agent.state = state
+
+    def close(self):
+        # Writes any streamed rows still buffered and stops parallel
+        # workers; the model can be inspected afterwards
+        if hasattr(self.datacollector, "close"):
+            self.datacollector.close()
+        if self.step_engine is not None and hasattr(self.step_engine, "close"):
+            self.step_engine.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def checkpoint(self, directory):
+        save_checkpoint(self, directory)
+
+    @classmethod
+    def restore(cls, directory, **overrides):
+        # Continues exactly where checkpoint() left off; overrides (e.g.
+        # moderation=1) change constructor arguments for the continuation
+        return resume(cls, *load_checkpoint(directory), **overrides)
+
+    def fork(self, **overrides):
+        # In-memory checkpoint and restore: the branch shares the topology
+        # and demographics, and copies only the state vector and history
+        output_dir = self.init_params["output_dir"]
+        if output_dir is not None and (
+            overrides.get("output_dir", output_dir) == output_dir
+        ):
+            raise ValueError(
+                "A fork of a streaming model needs its own output_dir."
+            )
+        counts, states = collected_rows(self)
+        schedule = None
+        if self.agent_list is not None:
+            schedule = schedule_order(self)
+        arrays = {
+            "schedule": schedule,
+            "counts": counts,
+            "agent_states": states,
+        }
+        population = (
+            self.state_codes.copy(),
+            self.age_codes,
+            self.education_codes,
+            self.sex_codes,
+        )
+        return resume(
+            type(self), capture(self), population, self.topology, arrays,
+            **overrides,
+        )
+
+    def check_convergence(self):
+        if self.convergence is None:
+            return
+        if self.convergence.update(self.state_counts, self.state_codes):
+            self.running = False
+            self.converged_step = self.steps
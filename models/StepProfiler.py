@@ -0,0 +1,77 @@
+import json
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from enums.State import State
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class StepProfiler:
+    # One record per step: seconds per phase, agents evaluated, transitions
+    # fired per rule and the process memory high-water mark. Phases are
+    # closed with lap(), which charges the time since the previous lap
+    def __init__(self):
+        self.records = []
+        self.record = None
+        self.before = None
+        self.started = 0.0
+        self.last = 0.0
+
+    def begin(self, model):
+        self.before = model.state_codes.copy()
+        # Agents in a state with an outgoing rule are the ones evaluated
+        evaluated = sum(
+            model.state_counts[state] for state in model.rules.active_states
+        )
+        self.record = {"step": model.steps, "evaluated": int(evaluated)}
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.add(phase, now - self.last)
+        self.last = now
+
+    def add(self, phase, seconds):
+        self.record[phase] = self.record.get(phase, 0.0) + seconds
+
+    def end(self, model):
+        record = self.record
+        record["total"] = time.perf_counter() - self.started
+        # The per-agent loop times neighbor counting inside "evaluate";
+        # what is left of it is rule scoring and state updates
+        if "neighbors" in record:
+            record["rules"] = record.pop("evaluate") - record["neighbors"]
+
+        # Each agent changes state at most once per step, so comparing
+        # with the step's starting states recovers every firing
+        after = model.state_codes
+        changed = np.flatnonzero(after != self.before)
+        pairs = np.bincount(
+            self.before[changed].astype(np.int64) * len(State) + after[changed],
+            minlength=len(State) ** 2,
+        )
+        rules = model.rules
+        for name, old, new in zip(rules.names, rules.sources, rules.targets):
+            record[name] = int(pairs[old * len(State) + new])
+        record["peak_rss_mb"] = peak_rss_mb()
+        self.records.append(record)
+        self.record = None
+
+    def dataframe(self):
+        frame = pd.DataFrame(self.records)
+        if frame.empty:
+            return frame
+        return frame.set_index("step").fillna(0.0)
+
+    def to_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
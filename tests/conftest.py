@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+# The model packages are imported from the repository root, as the
+# dashboard and python -m fakenews do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# A low S->E threshold keeps agents changing state for the whole run, so
+# matching trajectories are not an artefact of an early fixed point
+DEFAULTS = {"num_agents": 1500, "seed": 3, "threshold_SE": 0.9}
+
+
+def run_model(steps=15, **kwargs):
+    from models.DisinformationModel import DisinformationModel
+
+    model = DisinformationModel(**{**DEFAULTS, **kwargs})
+    for _ in range(steps):
+        model.step()
+    model.close()
+    return model
+
+
+def collected(model):
+    return model.datacollector.get_model_vars_dataframe().to_numpy()
+
+
+@pytest.fixture
+def graph_cache():
+    # A private cache per test, so tests never share built topologies
+    from graphs.GraphCache import GraphCache
+    from models.DisinformationModel import DisinformationModel
+
+    previous = DisinformationModel.graph_cache
+    DisinformationModel.graph_cache = GraphCache()
+    yield DisinformationModel.graph_cache
+    DisinformationModel.graph_cache = previous
@@ -0,0 +1,114 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import run_model
+from experiments import Calibration, Sweep
+from experiments.Calibration import Calibrator
+from fakenews.__main__ import main
+
+OBSERVED = ["Exposed", "Infected"]
+
+
+@pytest.fixture
+def observed():
+    model = run_model(steps=10, num_agents=500, seed=2, engine="numpy")
+    counts = model.datacollector.get_model_vars_dataframe()
+    return counts[OBSERVED] / 500
+
+
+def test_calibrator_is_reproducible(observed, graph_cache):
+    def calibrate():
+        calibrator = Calibrator(
+            observed,
+            bounds={"threshold_SE": (0.5, 2.5), "threshold_EI": (0.5, 2.5)},
+            base={"num_agents": 500},
+            particles=10,
+            batch_size=20,
+            workers=1,
+            seed=0,
+        )
+        return calibrator.run(generations=2).posterior()
+
+    first = calibrate()
+    pd.testing.assert_frame_equal(calibrate(), first)
+    # Every candidate ran on the one topology derived from the seed
+    assert len(graph_cache.entries) == 1
+
+
+@pytest.fixture
+def calibrators(monkeypatch):
+    # Records the calibrators the command line builds
+    built = []
+
+    class Recording(Calibrator):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            built.append(self)
+
+    monkeypatch.setattr(Calibration, "Calibrator", Recording)
+    return built
+
+
+def calibrate(*arguments):
+    return main([
+        "calibrate", *arguments, "--particles", "4", "--batch-size", "8",
+        "--workers", "1", "--generations", "1",
+    ])
+
+
+def test_counts_scale_by_warm_start_population(tmp_path, calibrators):
+    model = run_model(steps=3, num_agents=2000, engine="numpy")
+    model.checkpoint(tmp_path / "warm")
+    for _ in range(5):
+        model.step()
+    counts = model.datacollector.get_model_vars_dataframe()[OBSERVED]
+    counts.iloc[3:].to_csv(tmp_path / "observed.csv", index=False)
+
+    calibrate(
+        "--observed", str(tmp_path / "observed.csv"),
+        "--start", str(tmp_path / "warm"),
+    )
+    (calibrator,) = calibrators
+    expected = counts.iloc[3:].to_numpy() / 2000
+    assert np.allclose(calibrator.observed, expected)
+
+
+def test_counts_need_a_population(tmp_path, observed, calibrators):
+    (observed * 500).to_csv(tmp_path / "counts.csv", index=False)
+    with pytest.raises(SystemExit):
+        calibrate("--observed", str(tmp_path / "counts.csv"))
+    calibrate(
+        "--observed", str(tmp_path / "counts.csv"), "--num-agents", "500"
+    )
+    assert np.allclose(calibrators[0].observed, observed.to_numpy())
+    # Shares need no population at all
+    observed.to_csv(tmp_path / "shares.csv", index=False)
+    calibrate("--observed", str(tmp_path / "shares.csv"))
+    assert np.allclose(calibrators[1].observed, observed.to_numpy())
+
+
+def test_warm_start_is_mapped_once_per_worker(observed, monkeypatch):
+    start = run_model(steps=3, num_agents=5000, engine="numpy")
+    shipped = []
+
+    def run_tasks(tasks, *args, **kwargs):
+        shipped.extend(len(pickle.dumps(task)) for task in tasks)
+        return Sweep.run_tasks(tasks, *args, **kwargs)
+
+    monkeypatch.setattr(Calibration, "run_tasks", run_tasks)
+    points = np.linspace([0.5], [2.5], 16)
+
+    def distances(workers):
+        calibrator = Calibrator(
+            observed, bounds={"threshold_SE": (0.5, 2.5)}, start=start,
+            batch_size=8, workers=workers, seed=0,
+        )
+        return calibrator.distances(points)
+
+    # Workers map the same start the calling process does
+    assert np.array_equal(distances(2), distances(1))
+    # Tasks carry parameters, not the graph and population
+    assert max(shipped) < 10000
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import collected, run_model
+from models.DisinformationModel import DisinformationModel
+
+MODELS = [
+    {"engine": "agents", "update": "async"},
+    {"engine": "numpy", "compact": True},
+    {"engine": "numpy", "noise": "counter"},
+    # Without a seed the counter key comes from fresh entropy, which the
+    # checkpoint has to carry for the continuation to match
+    {"engine": "numpy", "noise": "counter", "seed": None},
+]
+
+
+def step_both(first, second, steps=10):
+    for _ in range(steps):
+        first.step()
+        second.step()
+
+
+@pytest.mark.parametrize("kwargs", MODELS, ids=str)
+def test_restore_continues_run(kwargs, tmp_path):
+    model = run_model(steps=5, **kwargs)
+    model.checkpoint(tmp_path / "checkpoint")
+    restored = DisinformationModel.restore(tmp_path / "checkpoint")
+    assert restored.steps == model.steps
+    step_both(model, restored)
+    assert np.array_equal(restored.state_codes, model.state_codes)
+    assert np.array_equal(collected(restored), collected(model))
+
+
+@pytest.mark.parametrize("kwargs", MODELS, ids=str)
+def test_fork_continues_run(kwargs):
+    model = run_model(steps=5, **kwargs)
+    fork = model.fork()
+    step_both(model, fork)
+    assert np.array_equal(fork.state_codes, model.state_codes)
+    assert np.array_equal(collected(fork), collected(model))
+
+
+def test_fork_overrides_arguments():
+    model = run_model(steps=5, engine="numpy")
+    fork = model.fork(moderation=1)
+    assert fork.threshold_SE != model.threshold_SE
+    assert np.array_equal(fork.age_codes, model.age_codes)
+
+
+def test_restore_streamed_run(tmp_path):
+    model = run_model(
+        steps=4, engine="numpy", output_dir=str(tmp_path / "first"),
+        chunk_size=1, agent_states=True,
+    )
+    model.checkpoint(tmp_path / "checkpoint")
+    restored = DisinformationModel.restore(
+        tmp_path / "checkpoint", output_dir=str(tmp_path / "second")
+    )
+    step_both(model, restored, steps=3)
+    first = model.datacollector.get_model_vars_dataframe()
+    second = restored.datacollector.get_model_vars_dataframe()
+    assert len(second) == restored.steps + 1
+    assert second.equals(first)
+    assert np.array_equal(
+        restored.datacollector.get_agent_states(),
+        model.datacollector.get_agent_states(),
+    )
+
+
+def test_checkpoint_references_mapped_graph(tmp_path):
+    from graphs.EdgeListLoader import load_edge_list
+
+    rng = np.random.default_rng(0)
+    path = tmp_path / "edges.txt"
+    np.savetxt(path, rng.integers(2000, size=(6000, 2)), fmt="%d")
+    graph = load_edge_list(str(path))
+    model = run_model(steps=3, topology=graph, engine="numpy")
+    model.checkpoint(tmp_path / "checkpoint")
+    # The memory-mapped CSR is referenced by path and digest, not copied
+    assert "topology" not in os.listdir(tmp_path / "checkpoint")
+    restored = DisinformationModel.restore(tmp_path / "checkpoint")
+    assert restored.topology.directory == graph.directory
+    step_both(model, restored)
+    assert np.array_equal(restored.state_codes, model.state_codes)
+
+    # A graph rebuilt with different edges no longer matches the digest
+    np.savetxt(path, rng.integers(2000, size=(5000, 2)), fmt="%d")
+    load_edge_list(str(path))
+    with pytest.raises(ValueError):
+        DisinformationModel.restore(tmp_path / "checkpoint")
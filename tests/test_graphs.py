@@ -0,0 +1,160 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from graphs.CSRGraph import CSRGraph
+from graphs.EdgeListLoader import load_edge_list, load_node_ids
+from graphs.GraphCache import GraphCache
+from graphs.Generators import (
+    barabasi_albert,
+    configuration_model,
+    erdos_renyi,
+    stochastic_block_model,
+    watts_strogatz,
+)
+
+NUM_NODES = 20000
+
+
+def assert_simple(graph):
+    # Undirected without self-loops or repeated edges, rows sorted
+    adjacency = graph.adjacency()
+    assert (adjacency != adjacency.T).nnz == 0
+    assert adjacency.diagonal().sum() == 0
+    for node in range(0, graph.num_nodes, max(1, graph.num_nodes // 100)):
+        neighbors = graph.neighbors(node)
+        assert (np.diff(neighbors) > 0).all()
+
+
+def test_erdos_renyi_degree():
+    rng = np.random.default_rng(0)
+    graph = erdos_renyi(NUM_NODES, 5 / NUM_NODES, rng)
+    assert_simple(graph)
+    assert graph.degree().mean() == pytest.approx(5, rel=0.03)
+
+
+
+def test_barabasi_albert_degree():
+    rng = np.random.default_rng(0)
+    graph = barabasi_albert(NUM_NODES, 3, rng)
+    assert_simple(graph)
+    degree = graph.degree()
+    assert degree.min() >= 1
+    assert degree.mean() == pytest.approx(6, rel=0.05)
+    # Preferential attachment leaves a heavy tail
+    assert degree.max() > 10 * degree.mean()
+
+
+def test_watts_strogatz_degree():
+    rng = np.random.default_rng(0)
+    lattice = watts_strogatz(NUM_NODES, 4, 0.0, rng)
+    assert (lattice.degree() == 4).all()
+    graph = watts_strogatz(NUM_NODES, 4, 0.1, rng)
+    assert_simple(graph)
+    assert graph.degree().mean() == pytest.approx(4, rel=0.02)
+
+
+def test_configuration_model_degree():
+    rng = np.random.default_rng(0)
+    graph = configuration_model(NUM_NODES, rng, exponent=2.5, min_degree=2)
+    assert_simple(graph)
+    # Erasing self-loops and multi-edges only loses a few stubs
+    assert np.median(graph.degree()) >= 2
+    assert graph.degree().max() > 20
+
+
+def test_stochastic_block_density():
+    rng = np.random.default_rng(0)
+    sizes = (5000, 5000)
+    graph = stochastic_block_model(10000, sizes, 1e-3, 1e-4, rng)
+    assert_simple(graph)
+    src, dst = graph.edges()
+    within = ((src < 5000) == (dst < 5000)).sum()
+    assert within / len(src) == pytest.approx(10 / 11, abs=0.02)
+
+
+def test_generators_validate_arguments():
+    rng = np.random.default_rng(0)
+    with pytest.raises(ValueError):
+        barabasi_albert(10, 10, rng)
+    with pytest.raises(ValueError):
+        watts_strogatz(10, 10, 0.1, rng)
+    with pytest.raises(ValueError):
+        stochastic_block_model(10, (4, 4), 0.5, 0.1, rng)
+
+
+def test_csr_round_trip(tmp_path):
+    graph = CSRGraph.from_edges(5, [0, 1, 3, 3], [1, 2, 4, 3])
+    assert_simple(graph)
+    graph.save(str(tmp_path))
+    loaded = CSRGraph.load(str(tmp_path))
+    assert loaded.num_edges == 3
+    assert loaded.digest() == graph.digest()
+
+
+def test_graph_cache_reuses_graphs(tmp_path):
+    cache = GraphCache(directory=str(tmp_path))
+    graph = cache.get("erdos_renyi", 1000, 3, prob=0.005)
+    assert cache.get("erdos_renyi", 1000, 3, prob=0.005) is graph
+    assert cache.get("erdos_renyi", 1000, 4, prob=0.005) is not graph
+    # A fresh cache over the same directory loads the stored arrays
+    loaded = GraphCache(directory=str(tmp_path)).get(
+        "erdos_renyi", 1000, 3, prob=0.005
+    )
+    assert np.array_equal(loaded.indptr, graph.indptr)
+    assert np.array_equal(loaded.indices, graph.indices)
+
+
+def test_graph_cache_evicts_oldest():
+    cache = GraphCache(max_entries=2)
+    first = cache.get("erdos_renyi", 100, 1, prob=0.05)
+    cache.get("erdos_renyi", 100, 2, prob=0.05)
+    cache.get("erdos_renyi", 100, 3, prob=0.05)
+    assert len(cache.entries) == 2
+    assert cache.get("erdos_renyi", 100, 1, prob=0.05) is not first
+
+
+@pytest.fixture
+def edges():
+    # Sparse, non-contiguous node IDs with repeated and reversed edges
+    rng = np.random.default_rng(1)
+    ids = rng.choice(10**9, size=500, replace=False)
+    pairs = ids[rng.integers(500, size=(3000, 2))]
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return np.concatenate([pairs, pairs[:100, ::-1]])
+
+
+def assert_matches_networkx(graph, node_ids, expected):
+    assert graph.num_nodes == expected.number_of_nodes()
+    src, dst = graph.edges()
+    actual = {frozenset(edge) for edge in zip(node_ids[src], node_ids[dst])}
+    assert actual == {frozenset(edge) for edge in expected.edges()}
+    degree = dict(zip(node_ids.tolist(), graph.degree().tolist()))
+    assert degree == dict(expected.degree())
+
+
+def test_edge_list_matches_networkx(edges, tmp_path):
+    path = tmp_path / "edges.txt"
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("# FromNodeId\tToNodeId\n")
+        for src, dst in edges:
+            file.write(f"{src}\t{dst}\n")
+    expected = nx.read_edgelist(path, nodetype=int)
+
+    graph = load_edge_list(str(path), chunk_edges=512)
+    node_ids = np.asarray(load_node_ids(str(path)))
+    assert_matches_networkx(graph, node_ids, expected)
+    # The second load maps the cached CSR instead of rebuilding it
+    cached = load_edge_list(str(path))
+    assert np.array_equal(cached.indices, graph.indices)
+
+
+def test_binary_edge_list_matches_text(edges, tmp_path):
+    path = tmp_path / "edges.bin"
+    edges.astype("<u4").tofile(path)
+    expected = nx.Graph()
+    expected.add_edges_from(edges.tolist())
+
+    graph = load_edge_list(str(path), binary_dtype="<u4", chunk_edges=512)
+    node_ids = np.asarray(load_node_ids(str(path)))
+    assert_matches_networkx(graph, node_ids, expected)
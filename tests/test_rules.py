@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from conftest import collected
+from enums.State import State
+from enums.transitions.TransitionRules import TransitionRules
+from models.DisinformationModel import DisinformationModel
+
+
+class RelapsingModel(DisinformationModel):
+    # Recovered agents surrounded by infected ones fall back to susceptible,
+    # under a threshold the default rule table does not know about
+    transition_rules = TransitionRules + [
+        (
+            State.RECOVERED,
+            State.SUSCEPTIBLE,
+            {State.INFECTED: +1, State.EXPOSED: +1},
+            "threshold_RS",
+            0,
+        ),
+    ]
+
+    def __init__(self, *args, threshold_RS=0.2, **kwargs):
+        self.threshold_RS = threshold_RS
+        super().__init__(*args, **kwargs)
+
+
+def run(**kwargs):
+    model = RelapsingModel(
+        num_agents=1500, seed=3, threshold_SE=0.9, **kwargs
+    )
+    for _ in range(15):
+        model.step()
+    model.close()
+    return model
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"engine": "agents", "update": "sync"},
+        {"engine": "parallel", "workers": 2},
+    ],
+    ids=str,
+)
+def test_subclass_thresholds_reach_every_engine(kwargs):
+    reference = run(engine="numpy")
+    assert State.RECOVERED in reference.rules.active_states
+    model = run(**kwargs)
+    assert np.array_equal(collected(model), collected(reference))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from conftest import run_model
+from experiments import Sweep
+from experiments.Sweep import COLUMNS, grid, sweep
+
+BASE = {"num_agents": 500, "threshold_SE": 0.9}
+
+
+def test_sweep_reads_cached_runs(tmp_path, monkeypatch):
+    design = grid(threshold_EI=[1.0, 1.5], moderation=[0, 1])
+    first = sweep(
+        design, seeds=(0, 1), steps=5, base=BASE, workers=1,
+        cache_dir=str(tmp_path),
+    )
+    assert first["run"].nunique() == 8
+
+    def simulate(params, seed, steps):
+        raise AssertionError("cached run was simulated again")
+
+    monkeypatch.setattr(Sweep, "simulate", simulate)
+    second = sweep(
+        design, seeds=(0, 1), steps=5, base=BASE, workers=1,
+        cache_dir=str(tmp_path),
+    )
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_sweep_matches_single_model():
+    frame = sweep([{}], seeds=(3,), steps=5, base=BASE, workers=1)
+    model = run_model(steps=5, engine="numpy", **BASE)
+    expected = model.datacollector.get_model_vars_dataframe()[COLUMNS]
+    assert np.array_equal(frame[COLUMNS].to_numpy(), expected.to_numpy())
+
+
+def test_seed_axis_replaces_replicate_seeds():
+    design = grid(seed=[1, 2], avg_node_degree=[3])
+    frame = sweep(design, seeds=(0, 5, 6), steps=3, base=BASE, workers=1)
+    assert frame.groupby("run")["seed"].first().tolist() == [1, 2]
@@ -0,0 +1,105 @@
+import numpy as np
+import solara
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.figure import Figure
+from mesa.visualization.utils import update_counter
+
+from enums.State import State
+from graphs.Layout import layout
+
+# Indexed by State.value, so a state vector maps straight to colors
+PALETTE = to_rgba_array([
+    "tab:green",   # SUSCEPTIBLE
+    "tab:blue",    # EXPOSED
+    "tab:red",     # INFECTED
+    "tab:orange",  # DOUBTFUL
+    "tab:gray",    # RECOVERED
+])
+
+
+class NetworkRenderer:
+    # Builds the figure once per topology; update() only recolors it from
+    # the model's state array. Above max_nodes it draws either a fixed
+    # random sample of nodes or, with mode="aggregate", a grid of cells
+    # colored by their state mix and sized by population
+    def __init__(
+        self, topology, max_nodes=5000, max_edges=5000, mode="sample",
+        bins=60, seed=0,
+    ):
+        if mode not in ("sample", "aggregate"):
+            raise ValueError(f"Unknown render mode: {mode}")
+        positions = layout(topology, seed)
+        num_nodes = topology.num_nodes
+        self.figure = Figure()
+        ax = self.figure.add_subplot()
+        ax.set_axis_off()
+
+        self.cells = None
+        if num_nodes > max_nodes and mode == "aggregate":
+            low, high = positions.min(axis=0), positions.max(axis=0)
+            scaled = (positions - low) / np.maximum(high - low, 1e-12)
+            ij = np.minimum((scaled * bins).astype(np.int64), bins - 1)
+            cells = ij[:, 0] * bins + ij[:, 1]
+            occupied, self.cells = np.unique(cells, return_inverse=True)
+            sizes = np.bincount(self.cells)
+            centers = np.stack(np.divmod(occupied, bins), axis=1) + 0.5
+            self.scatter = ax.scatter(
+                centers[:, 0], centers[:, 1],
+                s=120 * sizes / sizes.max(), linewidths=0,
+            )
+            self.title = f"{num_nodes} agents in {len(occupied)} cells"
+        else:
+            self.nodes = np.arange(num_nodes)
+            if num_nodes > max_nodes:
+                rng = np.random.default_rng(seed)
+                self.nodes = np.sort(
+                    rng.choice(num_nodes, size=max_nodes, replace=False)
+                )
+            drawn = positions[self.nodes]
+            if topology.num_edges <= max_edges and num_nodes <= max_nodes:
+                src, dst = topology.edges()
+                ax.add_collection(LineCollection(
+                    np.stack([positions[src], positions[dst]], axis=1),
+                    colors="lightgray", linewidths=0.5, zorder=0,
+                ))
+            size = max(2.0, min(40.0, 20000 / len(self.nodes)))
+            self.scatter = ax.scatter(
+                drawn[:, 0], drawn[:, 1], s=size, linewidths=0, zorder=1,
+            )
+            self.title = (
+                f"{len(self.nodes)} of {num_nodes} agents"
+                if num_nodes > max_nodes else f"{num_nodes} agents"
+            )
+        ax.set_title(self.title, fontsize="small")
+
+    def update(self, state_codes):
+        if self.cells is None:
+            colors = PALETTE[state_codes[self.nodes]]
+        else:
+            counts = np.bincount(
+                self.cells * len(State) + state_codes,
+                minlength=(self.cells.max() + 1) * len(State),
+            ).reshape(-1, len(State))
+            colors = (counts / counts.sum(axis=1, keepdims=True)) @ PALETTE
+        self.scatter.set_facecolor(colors)
+
+
+def make_network_component(max_nodes=5000, mode="sample"):
+    # Replacement for make_space_component(agent_portrayal): no per-agent
+    # portrayal calls, tooltips or relayout between steps
+    def MakeNetworkView(model):
+        return NetworkView(model, max_nodes=max_nodes, mode=mode)
+
+    return MakeNetworkView
+
+
+@solara.component
+def NetworkView(model, max_nodes=5000, mode="sample"):
+    update_counter.get()
+    renderer = solara.use_memo(
+        lambda: NetworkRenderer(model.topology, max_nodes=max_nodes, mode=mode),
+        dependencies=[model.topology, max_nodes, mode],
+    )
+    renderer.update(model.state_codes)
+    solara.FigureMatplotlib(renderer.figure, format="png")